@@ -0,0 +1,143 @@
+import gzip
+import hashlib
+import json
+
+from flask import Blueprint, Response, abort, current_app, request
+
+import queries
+from cache import cache
+from models import Venue, Artist
+
+#----------------------------------------------------------------------------#
+# JSON API.
+#----------------------------------------------------------------------------#
+
+api = Blueprint('api', __name__)
+
+VENUE_FIELDS = (
+    'id', 'name', 'genres', 'address', 'city', 'state', 'phone', 'website',
+    'facebook_link', 'seeking_talent', 'seeking_description', 'image_link'
+)
+ARTIST_FIELDS = (
+    'id', 'name', 'genres', 'city', 'state', 'phone', 'website',
+    'facebook_link', 'seeking_venue', 'seeking_description', 'image_link'
+)
+
+# Smaller bodies are not worth compressing
+GZIP_MIN_SIZE = 500
+
+
+def page_size():
+    limit = request.args.get(
+        'limit', current_app.config['API_PAGE_SIZE'], type=int
+    )
+    return min(max(limit, 1), current_app.config['API_MAX_PAGE_SIZE'])
+
+
+def sparse(item):
+    """
+    Only keep the fields listed in ?fields=, when given.
+    """
+    fields = request.args.get('fields')
+    if not fields:
+        return item
+    fields = set(fields.split(','))
+    return {key: value for key, value in item.items() if key in fields}
+
+
+def json_response(payload):
+    body = json.dumps(
+        payload, separators=(',', ':'), default=lambda value: value.isoformat()
+    )
+    response = Response(body, mimetype='application/json')
+    # Weak, the same representation may be sent gzipped or not
+    response.set_etag(hashlib.md5(body.encode()).hexdigest(), weak=True)
+    return response
+
+
+def page_response(data, next_cursor):
+    return json_response({
+        "data": [sparse(item) for item in data],
+        "next_cursor": next_cursor
+    })
+
+
+def entity_list(model, fields):
+    rows, next_cursor = queries.entity_page(
+        model, after=request.args.get('cursor', type=int),
+        per_page=page_size()
+    )
+    data = list()
+    for (entity, num_upcoming_shows) in rows:
+        item = {field: getattr(entity, field) for field in fields}
+        item["num_upcoming_shows"] = num_upcoming_shows
+        data.append(item)
+    return page_response(data, next_cursor)
+
+
+@api.route('/venues')
+@cache.cached('venues', 'shows')
+def venues():
+    return entity_list(Venue, VENUE_FIELDS)
+
+
+@api.route('/venues/<int:venue_id>')
+@cache.cached('venue:{venue_id}', 'shows')
+def venue(venue_id):
+    data = queries.venue_detail(venue_id)
+    if data is None:
+        abort(404)
+    return json_response(sparse(data))
+
+
+@api.route('/artists')
+@cache.cached('artists', 'shows')
+def artists():
+    return entity_list(Artist, ARTIST_FIELDS)
+
+
+@api.route('/artists/<int:artist_id>')
+@cache.cached('artist:{artist_id}', 'shows')
+def artist(artist_id):
+    data = queries.artist_detail(artist_id)
+    if data is None:
+        abort(404)
+    return json_response(sparse(data))
+
+
+@api.route('/shows')
+@cache.cached('shows')
+def shows():
+    page = queries.UpcomingShows(
+        after=request.args.get('cursor', type=queries.decode_show_cursor),
+        per_page=page_size()
+    )
+    data = list(page)
+    return page_response(data, page.next_cursor)
+
+
+@api.after_request
+def conditional_gzip(response):
+    """
+    Answer 304 when If-None-Match matches the ETag, otherwise gzip the body
+    for the clients accepting it.
+    """
+    if response.status_code != 200:
+        return response
+    response.make_conditional(request)
+    if response.status_code != 200:
+        return response
+
+    response.vary.add('Accept-Encoding')
+    if 'gzip' not in request.accept_encodings or \
+            response.content_length < GZIP_MIN_SIZE:
+        return response
+
+    response.set_data(gzip.compress(response.get_data(), compresslevel=6))
+    response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+
+@api.errorhandler(404)
+def not_found_error(error):
+    return json_response({"error": "Not found"}), 404
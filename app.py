@@ -2,34 +2,106 @@
 # Imports
 # ----------------------------------------------------------------------------#
 
-import sys
-import json
-import dateutil.parser
-import babel
+import logging
+from datetime import date, timedelta
 from flask import Flask, render_template, request, Response, flash, redirect, \
-    url_for, jsonify
+    url_for, jsonify, abort, stream_with_context, current_app
 from flask_moment import Moment
 from flask_wtf.csrf import CSRFProtect
-from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
-import logging
 from logging import Formatter, FileHandler
-from flask_wtf import Form
-from forms import *
-from models import *
+from enums import Genre, State
+from forms import VenueForm, ArtistForm, ShowForm, AvailabilityForm, \
+    AvailabilityRuleForm
+from models import db, Venue, Artist, Availability
+import availability
+import booking
+import counters
+import engine
+import partitions
+import queries
+import search
+import validation
+from cache import cache
+from fragments import fragments
+from recent import recent
+from transactions import unit_of_work
+from api import api
+from assets import assets, assets_command
+from formatting import format_datetime, to_datetime
+from importer import import_command
+from exporter import export_command, exports
+from profiler import Profiler
+from warmup import warm_up, warmup_command
 
 # ----------------------------------------------------------------------------#
 # App Config.
 # ----------------------------------------------------------------------------#
 
-app = Flask(__name__)
-moment = Moment(app)
-app.config.from_object('config')
-csrf = CSRFProtect(app)
-# db imported from models.py
-db.init_app(app)
-
-migrate = Migrate(app, db)
+moment = Moment()
+csrf = CSRFProtect()
+
+# Views are collected here as this module is imported and added to each app
+# by create_app, under their function names, which the templates link to.
+views = list()
+
+
+def route(rule, **options):
+    def decorator(f):
+        views.append((rule, f, options))
+        return f
+    return decorator
+
+
+def create_app(config='config', cli=True, **settings):
+    """
+    Build the app from the `config` module, `settings` overriding it.
+
+    `cli` adds the flask commands and Flask-Migrate, and so imports
+    Alembic, which web workers, see wsgi.py, do without.
+    """
+    app = Flask(__name__)
+    app.config.from_object(config)
+    app.config.update(settings)
+    moment.init_app(app)
+    csrf.init_app(app)
+    # db imported from models.py
+    engine.configure(app)
+    db.init_app(app)
+    warm_up.init_app(app)
+
+    cache.init_app(app)
+    fragments.init_app(app)
+    recent.init_app(app)
+    unit_of_work.init_app(app)
+    assets.init_app(app)
+    app.register_blueprint(api, url_prefix='/api/v1')
+    app.register_blueprint(exports, url_prefix='/export')
+    profiler = Profiler(app)
+    app.jinja_env.filters['datetime'] = format_datetime
+
+    for rule, view, options in views:
+        app.add_url_rule(rule, view_func=view, **options)
+    app.register_error_handler(404, not_found_error)
+    app.register_error_handler(500, server_error)
+    if app.config['DEBUG_ENDPOINTS']:
+        register_debug_views(app, profiler)
+
+    if cli:
+        from flask_migrate import Migrate
+        Migrate(app, db)
+        app.cli.add_command(import_command)
+        app.cli.add_command(export_command)
+        app.cli.add_command(booking.book_command)
+        app.cli.add_command(counters.counters_command)
+        app.cli.add_command(availability.availability_command)
+        app.cli.add_command(partitions.partitions_command)
+        app.cli.add_command(assets_command)
+        app.cli.add_command(warmup_command)
+
+    if not app.debug:
+        configure_logging(app)
+
+    return app
 
 
 # ----------------------------------------------------------------------------#
@@ -37,28 +109,23 @@ migrate = Migrate(app, db)
 # ----------------------------------------------------------------------------#
 
 
-def format_datetime(value, format='medium'):
-    date = dateutil.parser.parse(value)
-    if format == 'full':
-        format = "EEEE MMMM, d, y 'at' h:mma"
-    elif format == 'medium':
-        format = "EE MM, dd, y h:mma"
-    return babel.dates.format_datetime(date, format, locale='en')
-
-
-app.jinja_env.filters['datetime'] = format_datetime
+def stream_template(template_name, **context):
+    # Render a template lazily, chunk by chunk, as the context is iterated
+    current_app.update_template_context(context)
+    stream = current_app.jinja_env.get_template(template_name).stream(context)
+    stream.enable_buffering(10)
+    return stream
 
 
 # ----------------------------------------------------------------------------#
 # Controllers.
 # ----------------------------------------------------------------------------#
 
-@app.route('/')
+@route('/')
 def index():
-    # 10 most recently added venues
-    venues = Venue.query.order_by(db.desc(Venue.id)).limit(10).all()
-    # 10 most recently added artists
-    artists = Artist.query.order_by(db.desc(Artist.id)).limit(10).all()
+    # 10 most recently added venues and artists, kept in process and
+    # reloaded when another worker announces a change, so not cached
+    venues, artists = recent.get()
 
     return render_template('pages/home.html', venues=venues, artists=artists)
 
@@ -66,57 +133,20 @@ def index():
 #  Venues
 #  ----------------------------------------------------------------
 
-@app.route('/venues')
+@route('/venues')
+@cache.cached('venues', 'shows')
 def venues():
-    data = list()
-    city_states = db.session.query(Venue.city, Venue.state).group_by(
-        Venue.city, Venue.state).all()
-    for (city, state) in city_states:
-        venues = Venue.query.filter_by(city=city, state=state).all()
-        venue_data = list()
-        for venue in venues:
-            # Get upcoming shows
-            now = datetime.now()
-            today = now.date()
-            upcoming_shows = Show.query.filter(
-                Show.venue_id == venue.id, Show.show_date >= today
-            ).count()
-
-            venue_data.append({
-                "id": venue.id,
-                "name": venue.name,
-                "num_upcoming_shows": upcoming_shows
-            })
+    data = queries.venue_areas()
 
-        data.append({
-            "city": city,
-            "state": state,
-            "venues": venue_data
-        })
+    return render_template('pages/venues.html', areas=data)
 
-    return render_template('pages/venues.html', areas=data);
 
-
-@app.route('/venues/search', methods=['POST'])
+@route('/venues/search', methods=['POST'])
 def search_venues():
-    search_term = request.form['search_term']
-    results = Venue.query.filter(Venue.name.ilike(f'%{search_term}%')).all()
-    data = list()
-    for venue in results:
-        today = datetime.today().date()
-        upcoming_shows_count = Show.query.filter(
-            Show.show_date >= today, Show.venue_id == venue.id).count()
-
-        data.append({
-            "id": venue.id,
-            "name": venue.name,
-            "num_upcoming_shows": upcoming_shows_count
-        })
-
-    response = {
-        "count": len(results),
-        "data": data
-    }
+    response = search.search_by_name(
+        Venue, request.form['search_term'],
+        page=request.form.get('page', 1, type=int)
+    )
 
     return render_template(
         'pages/search_venues.html', results=response,
@@ -124,35 +154,12 @@ def search_venues():
     )
 
 
-@app.route('/venues/searchbycitystate', methods=['POST'])
+@route('/venues/searchbycitystate', methods=['POST'])
 def search_venues_by_city_state():
-    search_term = request.form['search_term']
-    try:
-        city, state = search_term.split(',')[0].strip(), \
-                      search_term.split(',')[1].strip()
-        results = Venue.query.filter(
-            Venue.city == city, Venue.state == state
-        ).all()
-
-        data = list()
-        for venue in results:
-            today = datetime.today().date()
-            upcoming_shows_count = Show.query.filter(
-                Show.show_date >= today, Show.venue_id == venue.id).count()
-
-            data.append({
-                "id": venue.id,
-                "name": venue.name,
-                "num_upcoming_shows": upcoming_shows_count
-            })
-    except IndexError:
-        results = list()
-        data = list()
-
-    response = {
-        "count": len(results),
-        "data": data
-    }
+    response = search.search_by_city_state(
+        Venue, request.form['search_term'],
+        page=request.form.get('page', 1, type=int)
+    )
 
     return render_template(
         'pages/search_venues.html', results=response,
@@ -160,71 +167,12 @@ def search_venues_by_city_state():
     )
 
 
-@app.route('/venues/<int:venue_id>')
+@route('/venues/<int:venue_id>')
+@cache.cached('venue:{venue_id}', 'shows')
 def show_venue(venue_id):
-    now = datetime.now()
-    today = now.date()
-    venue = Venue.query.get(venue_id)
-    genres = venue.genres
-    # Get past shows
-    results = db.session.query(
-        Show, Artist
-    ).join(Venue.shows).join(Show.artist).filter(
-        Show.venue_id == venue_id, Show.show_date < today
-    )
-
-    past_shows = list()
-    past_count = results.count()
-    # Return query results
-    results = results.all()
-    for (show, artist) in results:
-        showdatetime = datetime.combine(show.show_date, show.show_time)
-        past_shows.append({
-            "artist_id": artist.id,
-            "artist_name": artist.name,
-            "artist_image_link": artist.image_link,
-            "start_time": showdatetime.isoformat()
-        })
-
-    # Get upcoming shows
-    results = db.session.query(
-        Show, Artist
-    ).join(Venue.shows).join(Show.artist).filter(
-        Show.venue_id == venue_id, Show.show_date >= today
-    )
-
-    upcoming_shows = list()
-    upcoming_count = results.count()
-    # Return query results
-    results = results.all()
-    for (show, artist) in results:
-        showdatetime = datetime.combine(show.show_date, show.show_time)
-        upcoming_shows.append({
-            "artist_id": artist.id,
-            "artist_name": artist.name,
-            "artist_image_link": artist.image_link,
-            "start_time": showdatetime.isoformat()
-        })
-
-    # Populate data to be sent to template
-    data = {
-        "id": venue.id,
-        "name": venue.name,
-        "genres": genres,
-        "address": venue.address,
-        "city": venue.city,
-        "state": venue.state,
-        "phone": venue.phone,
-        "website": venue.website,
-        "facebook_link": venue.facebook_link,
-        "seeking_talent": venue.seeking_talent,
-        "seeking_description": venue.seeking_description,
-        "image_link": venue.image_link,
-        "past_shows": past_shows,
-        "upcoming_shows": upcoming_shows,
-        "past_shows_count": len(past_shows),
-        "upcoming_shows_count": len(upcoming_shows)
-    }
+    data = queries.venue_detail(venue_id)
+    if data is None:
+        abort(404)
 
     return render_template('pages/show_venue.html', venue=data)
 
@@ -233,34 +181,36 @@ def show_venue(venue_id):
 #  ----------------------------------------------------------------
 
 
-@app.route('/venues/create', methods=['GET'])
+@route('/venues/create', methods=['GET'])
 def create_venue_form():
     form = VenueForm()
     return render_template('forms/new_venue.html', form=form)
 
 
-@app.route('/venues/create', methods=['POST'])
+@route('/venues/create', methods=['POST'])
 def create_venue_submission():
     form = VenueForm(request.form)
     if form.validate_on_submit():
-        try:
+        @unit_of_work('create venue')
+        def create():
             venue = Venue()
             form.populate_obj(venue)
-
             db.session.add(venue)
-            db.session.commit()
-            # on successful db insert, flash success
-            flash('Venue ' + request.form['name'] + ' was successfully listed!')
+            return venue
+
+        try:
+            venue = create()
         except Exception:
-            db.session.rollback()
-            print(sys.exc_info())
             flash(
                 'An error occurred. Venue ' + request.form['name'] +
                 ' could not be listed.',
                 'error'
             )
-        finally:
-            db.session.close()
+        else:
+            cache.invalidate('venues')
+            recent.add(venue)
+            # on successful db insert, flash success
+            flash('Venue ' + request.form['name'] + ' was successfully listed!')
 
         return redirect(url_for('index'))
 
@@ -273,21 +223,23 @@ def create_venue_submission():
     return render_template('forms/new_venue.html', form=form)
 
 
-@app.route('/venues/<venue_id>/delete', methods=['DELETE'])
+@route('/venues/<venue_id>/delete', methods=['DELETE'])
 def delete_venue(venue_id):
+    @unit_of_work('delete venue')
+    def delete():
+        counters.delete(Venue.query.get(venue_id))
+
     try:
-        venue = Venue.query.get(venue_id)
-        db.session.delete(venue)
-        db.session.commit()
-        flash('Venue deleted successfully.')
+        delete()
     except Exception:
-        db.session.rollback()
         flash(
             'An error occured. Could not delete Venue',
             'error'
         )
-    finally:
-        db.session.close()
+    else:
+        cache.invalidate('venues', 'artists', f'venue:{venue_id}', 'shows')
+        recent.invalidate()
+        flash('Venue deleted successfully.')
 
     return jsonify({'success': True})
 
@@ -296,7 +248,8 @@ def delete_venue(venue_id):
 #  ----------------------------------------------------------------
 
 
-@app.route('/artists')
+@route('/artists')
+@cache.cached('artists')
 def artists():
     all_artists = Artist.query.all()
     data = list()
@@ -309,27 +262,12 @@ def artists():
     return render_template('pages/artists.html', artists=data)
 
 
-@app.route('/artists/search', methods=['POST'])
+@route('/artists/search', methods=['POST'])
 def search_artists():
-    search_term = request.form['search_term']
-    results = Artist.query.filter(Artist.name.ilike(f'%{search_term}%')).all()
-    data = list()
-    for artist in results:
-        today = datetime.today().date()
-        num_upcoming_shows = Show.query.filter(
-            Show.show_date >= today, Show.artist_id == artist.id
-        ).count()
-
-        data.append({
-            "id": artist.id,
-            "name": artist.name,
-            "num_upcoming_shows": num_upcoming_shows,
-        })
-
-    response = {
-        "count": len(results),
-        "data": data
-    }
+    response = search.search_by_name(
+        Artist, request.form['search_term'],
+        page=request.form.get('page', 1, type=int)
+    )
 
     return render_template(
         'pages/search_artists.html', results=response,
@@ -337,35 +275,12 @@ def search_artists():
     )
 
 
-@app.route('/artists/searchbycitystate', methods=['POST'])
+@route('/artists/searchbycitystate', methods=['POST'])
 def search_artists_by_city_state():
-    search_term = request.form['search_term']
-    try:
-        city, state = search_term.split(',')[0].strip(), \
-                      search_term.split(',')[1].strip()
-        results = Artist.query.filter(
-            Artist.city == city, Artist.state == state
-        ).all()
-
-        data = list()
-        for artist in results:
-            today = datetime.today().date()
-            upcoming_shows_count = Show.query.filter(
-                Show.show_date >= today, Show.artist_id == artist.id).count()
-
-            data.append({
-                "id": artist.id,
-                "name": artist.name,
-                "num_upcoming_shows": upcoming_shows_count
-            })
-    except IndexError:
-        results = list()
-        data = list()
-
-    response = {
-        "count": len(results),
-        "data": data
-    }
+    response = search.search_by_city_state(
+        Artist, request.form['search_term'],
+        page=request.form.get('page', 1, type=int)
+    )
 
     return render_template(
         'pages/search_artists.html', results=response,
@@ -373,74 +288,13 @@ def search_artists_by_city_state():
     )
 
 
-@app.route('/artists/<int:artist_id>')
+@route('/artists/<int:artist_id>')
+@cache.cached('artist:{artist_id}', 'shows')
 def show_artist(artist_id):
     # shows the artist page with the given artist_id
-    now = datetime.now()
-    today = now.date()
-    artist = Artist.query.get(artist_id)
-    # Query for next 5 available dates
-    available = db.session.query(Availability).filter(
-        Availability.artist == artist, Availability.date >= today
-    ).order_by(Availability.date).limit(5).all()
-    # Convert availabilities to datetime.isoformat()
-    availabilities = [
-        datetime.combine(a.date, a.time).isoformat() for a in available
-    ]
-
-    # Get past shows
-    results = db.session.query(
-        Venue, Show
-    ).join(Show.venue).join(Show.artist).filter(
-        Show.artist_id == artist.id, Show.show_date < today
-    )
-
-    past_shows = list()
-    for (venue, show) in results.all():
-        showdatetime = datetime.combine(show.show_date, show.show_time)
-        past_shows.append({
-            "venue_id": venue.id,
-            "venue_name": venue.name,
-            "venue_image_link": venue.image_link,
-            "start_time": showdatetime.isoformat()
-        })
-
-    # Get upcoming shows
-    results = db.session.query(
-        Venue, Show
-    ).join(Show.venue).join(Show.artist).filter(
-        Show.artist_id == artist.id, Show.show_date >= today
-    )
-
-    upcoming_shows = list()
-    for (venue, show) in results.all():
-        showdatetime = datetime.combine(show.show_date, show.show_time)
-        upcoming_shows.append({
-            "venue_id": venue.id,
-            "venue_name": venue.name,
-            "venue_image_link": venue.image_link,
-            "start_time": showdatetime.isoformat()
-        })
-
-    # Populate data to be sent to template
-    data = {
-        "id": artist.id,
-        "name": artist.name,
-        "genres": artist.genres,
-        "city": artist.city,
-        "state": artist.state,
-        "phone": artist.phone,
-        "website": artist.website,
-        "facebook_link": artist.facebook_link,
-        "seeking_venue": artist.seeking_venue,
-        "seeking_description": artist.seeking_description,
-        "image_link": artist.image_link,
-        "past_shows": past_shows,
-        "upcoming_shows": upcoming_shows,
-        "past_shows_count": len(past_shows),
-        "upcoming_shows_count": len(upcoming_shows),
-        "availabilities": availabilities
-    }
+    data = queries.artist_detail(artist_id)
+    if data is None:
+        abort(404)
 
     return render_template('pages/show_artist.html', artist=data)
 
@@ -449,34 +303,95 @@ def show_artist(artist_id):
 #  ----------------------------------------------------------------
 
 
-@app.route('/artists/<artist_id>/add_availability', methods=['GET'])
+@route('/artists/available')
+@cache.cached('artists', 'availabilities')
+def available_artists():
+    start = request.args.get('start', type=date.fromisoformat) or \
+        date.today()
+    end = request.args.get('end', type=date.fromisoformat) or \
+        start + timedelta(days=30)
+    # Recurring availabilities are only expanded that far ahead, by
+    # `flask availability materialize`
+    horizon = current_app.config['AVAILABILITY_HORIZON_DAYS']
+    end = min(end, date.today() + timedelta(days=horizon))
+    filters = {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "genre": request.args.get('genre') if request.args.get('genre') in
+        validation.GENRES else None,
+        "state": request.args.get('state') if request.args.get('state') in
+        validation.STATES else None
+    }
+    results = availability.AvailableArtists(
+        start, end, genre=filters['genre'], state=filters['state'],
+        after=request.args.get(
+            'after', type=availability.decode_availability_cursor
+        ),
+        per_page=current_app.config['SEARCH_PAGE_SIZE']
+    )
+
+    return Response(stream_with_context(
+        stream_template(
+            'pages/available_artists.html', results=results,
+            filters=filters, genres=Genre.choices(), states=State.choices()
+        )
+    ))
+
+
+@route('/artists/<artist_id>/add_availability', methods=['GET'])
 def add_availability(artist_id):
     artist = Artist.query.get(artist_id)
+    if artist is None:
+        abort(404)
     form = AvailabilityForm()
+    rule_form = AvailabilityRuleForm()
 
     return render_template(
-        'forms/new_availability.html', form=form, artist=artist
+        'forms/new_availability.html', form=form, rule_form=rule_form,
+        artist=artist
     )
 
 
-@app.route('/artists/<artist_id>/add_availability', methods=['POST'])
+@route('/artists/<artist_id>/add_availability', methods=['POST'])
 def add_availability_submission(artist_id):
-    artist = Artist.query.get(artist_id)
-    try:
-        # Parse availability into a datetime object
-        available_datetime = dateutil.parser.parse(request.form['start_time'])
-
+    @unit_of_work('add availability')
+    def add(available_datetime):
         availability = Availability(
             date=available_datetime.date(), time=available_datetime.time()
         )
-        availability.artist = artist
+        availability.artist = Artist.query.get(artist_id)
         db.session.add(availability)
-        db.session.commit()
+
+    try:
+        # Parse availability into a datetime object
+        add(to_datetime(request.form['start_time']))
     except Exception:
-        db.session.rollback()
         flash('An error occured, listing could not be submitted.')
-    finally:
-        db.session.close()
+    else:
+        cache.invalidate(f'artist:{artist_id}', 'availabilities')
+
+    return redirect(url_for('show_artist', artist_id=artist_id))
+
+
+@route('/artists/<int:artist_id>/add_availability_rule',
+       methods=['POST'])
+def add_availability_rule_submission(artist_id):
+    form = AvailabilityRuleForm(request.form)
+    if not form.validate_on_submit():
+        flash('An error occured, availabilities could not be listed.')
+        return redirect(url_for('add_availability', artist_id=artist_id))
+    add_rule = unit_of_work('add availability rule')(availability.add_rule)
+    try:
+        expanded = add_rule(
+            artist_id, form.weekdays.data, form.time.data,
+            form.start_date.data, form.end_date.data,
+            horizon=current_app.config['AVAILABILITY_HORIZON_DAYS']
+        )
+    except Exception:
+        flash('An error occured, availabilities could not be listed.')
+    else:
+        cache.invalidate(f'artist:{artist_id}', 'availabilities')
+        flash(f'{expanded} dates were successfully listed!')
 
     return redirect(url_for('show_artist', artist_id=artist_id))
 
@@ -485,7 +400,7 @@ def add_availability_submission(artist_id):
 #  ----------------------------------------------------------------
 
 
-@app.route('/artists/<int:artist_id>/edit', methods=['GET'])
+@route('/artists/<int:artist_id>/edit', methods=['GET'])
 def edit_artist(artist_id):
     artist = Artist.query.get(artist_id)
 
@@ -494,23 +409,27 @@ def edit_artist(artist_id):
     return render_template('forms/edit_artist.html', form=form, artist=artist)
 
 
-@app.route('/artists/<int:artist_id>/edit', methods=['POST'])
+@route('/artists/<int:artist_id>/edit', methods=['POST'])
 def edit_artist_submission(artist_id):
     form = ArtistForm(request.form)
     artist = Artist.query.get(artist_id)
     if form.validate_on_submit():
-        try:
+        @unit_of_work('edit artist')
+        def edit():
+            artist = Artist.query.get(artist_id)
             form.populate_obj(artist)
-            db.session.commit()
+            return artist
+
+        try:
+            artist = edit()
         except Exception:
-            db.session.rollback()
-            print(sys.exc_info())
             flash(
                 'An error occurred. Artist ' + artist.name + ' could not be Edited.',
                 'error'
             )
-        finally:
-            db.session.close()
+        else:
+            cache.invalidate('artists', f'artist:{artist_id}', 'shows')
+            recent.update(artist)
 
         return redirect(url_for('show_artist', artist_id=artist_id))
 
@@ -523,7 +442,7 @@ def edit_artist_submission(artist_id):
     return render_template('forms/edit_artist.html', form=form, artist=artist)
 
 
-@app.route('/venues/<int:venue_id>/edit', methods=['GET'])
+@route('/venues/<int:venue_id>/edit', methods=['GET'])
 def edit_venue(venue_id):
     venue = Venue.query.get(venue_id)
 
@@ -532,24 +451,28 @@ def edit_venue(venue_id):
     return render_template('forms/edit_venue.html', form=form, venue=venue)
 
 
-@app.route('/venues/<int:venue_id>/edit', methods=['POST'])
+@route('/venues/<int:venue_id>/edit', methods=['POST'])
 def edit_venue_submission(venue_id):
     form = VenueForm(request.form)
     venue = Venue.query.get(venue_id)
     if form.validate_on_submit():
-        try:
+        @unit_of_work('edit venue')
+        def edit():
+            venue = Venue.query.get(venue_id)
             form.populate_obj(venue)
-            db.session.commit()
+            return venue
+
+        try:
+            venue = edit()
         except Exception:
-            db.session.rollback()
-            print(sys.exc_info())
             flash(
                 'An error occurred. Venue ' + venue.name +
                 ' could not be Edited.',
                 'error'
             )
-        finally:
-            db.session.close()
+        else:
+            cache.invalidate('venues', f'venue:{venue_id}', 'shows')
+            recent.update(venue)
 
         return redirect(url_for('show_venue', venue_id=venue_id))
 
@@ -566,35 +489,37 @@ def edit_venue_submission(venue_id):
 #  ----------------------------------------------------------------
 
 
-@app.route('/artists/create', methods=['GET'])
+@route('/artists/create', methods=['GET'])
 def create_artist_form():
     form = ArtistForm()
     return render_template('forms/new_artist.html', form=form)
 
 
-@app.route('/artists/create', methods=['POST'])
+@route('/artists/create', methods=['POST'])
 def create_artist_submission():
     # called upon submitting the new artist listing form
     form = ArtistForm(request.form)
     if form.validate_on_submit():
-        try:
+        @unit_of_work('create artist')
+        def create():
             artist = Artist()
             form.populate_obj(artist)
-
             db.session.add(artist)
-            db.session.commit()
-            # on successful db insert, flash success
-            flash('Artist ' + request.form['name'] + ' was successfully listed!')
+            return artist
+
+        try:
+            artist = create()
         except Exception:
-            db.session.rollback()
-            print(sys.exc_info())
             flash(
                 'An error occurred. Artist ' + request.form['name'] +
                 ' could not be listed.',
                 'error'
             )
-        finally:
-            db.session.close()
+        else:
+            cache.invalidate('artists')
+            recent.add(artist)
+            # on successful db insert, flash success
+            flash('Artist ' + request.form['name'] + ' was successfully listed!')
 
         return redirect(url_for('index'))
 
@@ -610,102 +535,51 @@ def create_artist_submission():
 #  Shows
 #  ----------------------------------------------------------------
 
-@app.route('/shows')
+@route('/shows')
+@cache.cached('shows')
 def shows():
-    # displays list of shows at /shows
-    # # Get upcoming shows
-    now = datetime.now()
-    today = now.date()
-    results = Show.query.filter(Show.show_date >= today).all()
-    data = list()
-    for show in results:
-        showdatetime = datetime.combine(show.show_date, show.show_time)
-        data.append({
-            "venue_id": show.venue.id,
-            "venue_name": show.venue.name,
-            "artist_id": show.artist.id,
-            "artist_name": show.artist.name,
-            "artist_image_link": show.artist.image_link,
-            "start_time": showdatetime.isoformat()
-        })
+    # displays one page of upcoming shows at /shows,
+    # a malformed cursor falls back to the first page
+    after = request.args.get('after', type=queries.decode_show_cursor)
+    data = queries.UpcomingShows(
+        after=after, per_page=current_app.config['SHOWS_PAGE_SIZE']
+    )
 
-    return render_template('pages/shows.html', shows=data)
+    return Response(stream_with_context(
+        stream_template('pages/shows.html', shows=data)
+    ))
 
 
-@app.route('/shows/create')
+@route('/shows/create')
 def create_shows():
     # renders form. do not touch.
     form = ShowForm()
     return render_template('forms/new_show.html', form=form)
 
 
-@app.route('/shows/create', methods=['POST'])
+@route('/shows/create', methods=['POST'])
 def create_show_submission():
     # called to create new shows in the db, upon submitting new show listing form
     form = ShowForm(request.form)
-    message = ''
     if form.validate_on_submit():
+        book_show = unit_of_work(
+            'book show', expected=booking.BookingError
+        )(booking.book_show)
         try:
-            artist = Artist.query.get(form.artist_id.data)
-            venue = Venue.query.get(form.venue_id.data)
-            # If artist doesn't exist in the database
-            if not artist:
-                error_source = 'Artist'
-                source_id = form.artist_id.data
-                message = f"{error_source} with ID {source_id} does not exist."
-                raise Exception
-            # If venue doesn't exist in the database
-            elif not venue:
-                error_source = 'Venue'
-                source_id = form.venue_id.data
-                message = f"{error_source} with ID {source_id} does not exist."
-                raise Exception
-
-            show_datetime = dateutil.parser.parse(form.start_time.data)
-
-            # Check if the artist is available at the given date and time
-            results = db.session.query(
-                Availability.date, Availability.time).filter(
-                Availability.artist == artist,
-                Availability.date == show_datetime.date(),
-                Availability.time <= show_datetime.time()
-            ).first()
-            # If no results are found -> the artist is not available
-            if not results:
-                message = \
-                    f"{artist.name} is not available on " \
-                    f"{request.form['start_time']}"
-                raise Exception
-
-            # Check if a show at this venue is already schedueled at the given date
-            exist_show = Show.query.filter_by(
-                venue_id=venue.id, show_date=show_datetime.date()
-            ).first()
-            # If a show is already scheduled at the given time raise an exception
-            if exist_show is not None:
-                message = \
-                    f"{venue.name} has already a scheduled show on the " \
-                    f"{show_datetime.date()}"
-                raise Exception
-
-            show = Show(show_date=show_datetime.date(),
-                        show_time=show_datetime.time())
-            show.artist = artist
-            show.venue = venue
-
-            db.session.add(show)
-            db.session.commit()
-            # on successful db insert, flash success
-            flash('Show was successfully listed!')
-        except Exception:
-            db.session.rollback()
-            print(sys.exc_info())
+            book_show(
+                form.artist_id.data, form.venue_id.data, form.start_time.data
+            )
+        except booking.BookingError as error:
             flash(
-                f'An error occurred. Show could not be listed. {message}',
+                f'An error occurred. Show could not be listed. {error}',
                 'error'
             )
-        finally:
-            db.session.close()
+        except Exception:
+            flash('An error occurred. Show could not be listed.', 'error')
+        else:
+            cache.invalidate('venues', 'artists', 'shows', 'availabilities')
+            # on successful db insert, flash success
+            flash('Show was successfully listed!')
 
         # return render_template('pages/home.html')
         return redirect(url_for('index'))
@@ -713,17 +587,46 @@ def create_show_submission():
     return render_template('forms/new_show.html', form=form)
 
 
-@app.errorhandler(404)
+#  Debug
+#  ----------------------------------------------------------------
+
+
+def register_debug_views(app, profiler):
+    @app.route('/_debug/cache')
+    def cache_stats():
+        return jsonify(cache.stats())
+
+    @app.route('/_debug/fragments')
+    def fragment_stats():
+        return jsonify(fragments.stats())
+
+    @app.route('/_debug/profile')
+    def profile():
+        # most recent requests first
+        return jsonify(list(reversed(profiler.history)))
+
+    @app.route('/_debug/pool')
+    def pool_stats():
+        return jsonify(engine.metrics.snapshot(db.engine.pool))
+
+    @app.route('/_debug/transactions')
+    def transaction_stats():
+        return jsonify(unit_of_work.stats())
+
+    @app.route('/_debug/warmup')
+    def warmup_stats():
+        return jsonify(app.extensions['warmup'].timings)
+
+
 def not_found_error(error):
     return render_template('errors/404.html'), 404
 
 
-@app.errorhandler(500)
 def server_error(error):
     return render_template('errors/500.html'), 500
 
 
-if not app.debug:
+def configure_logging(app):
     file_handler = FileHandler('error.log')
     file_handler.setFormatter(
         Formatter(
@@ -733,6 +636,12 @@ if not app.debug:
     app.logger.setLevel(logging.INFO)
     file_handler.setLevel(logging.INFO)
     app.logger.addHandler(file_handler)
+    profiler_logger = logging.getLogger('fyyur.profiler')
+    profiler_logger.setLevel(logging.INFO)
+    profiler_logger.addHandler(file_handler)
+    transactions_logger = logging.getLogger('fyyur.transactions')
+    transactions_logger.setLevel(logging.INFO)
+    transactions_logger.addHandler(file_handler)
     app.logger.info('errors')
 
 # ----------------------------------------------------------------------------#
@@ -741,11 +650,11 @@ if not app.debug:
 
 # Default port:
 if __name__ == '__main__':
-    app.run()
+    create_app().run()
 
 # Or specify port manually:
 '''
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port)
+    create_app().run(host='0.0.0.0', port=port)
 '''
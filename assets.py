@@ -0,0 +1,214 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+
+import click
+from flask import current_app, request, send_from_directory, url_for
+from flask.cli import AppGroup
+
+# Bundles of the static files, in load order, named after the file built
+BUNDLES = {
+    'site.css': [
+        'css/bootstrap.min.css',
+        'css/layout.main.css',
+        'css/main.css',
+        'css/main.responsive.css',
+        'css/main.quickfix.css'
+    ],
+    'head.js': [
+        'js/libs/modernizr-2.8.2.min.js',
+        'js/libs/moment.min.js'
+    ],
+    'site.js': [
+        'js/libs/bootstrap-3.1.1.min.js',
+        'js/plugins.js',
+        'js/script.js'
+    ],
+    # Loaded on their own: the jQuery fallback and respond.js for old IE
+    'jquery.js': ['js/libs/jquery-1.11.1.min.js'],
+    'respond.js': ['js/libs/respond-1.4.2.min.js']
+}
+
+# Built into static/dist, one level deep like static/css, so the relative
+# font urls of the stylesheets still resolve
+DIST = 'dist'
+MANIFEST = 'manifest.json'
+
+# Content encodings of the precompressed siblings, in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+#----------------------------------------------------------------------------#
+# Minification.
+#----------------------------------------------------------------------------#
+
+CSS_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+# Not before a colon, which would turn `a :hover` into `a:hover`
+CSS_SPACE = re.compile(r'\s*([{};,>])\s*|(:)\s+')
+
+
+def minify_css(text):
+    text = CSS_COMMENT.sub('', text)
+    text = CSS_SPACE.sub(r'\1\2', ' '.join(text.split()))
+    return text.replace(';}', '}')
+
+
+def minify_js(text):
+    """
+    Drop indentation, blank lines and whole line comments only, which is
+    safe for any script. Libraries are shipped minified already.
+    """
+    lines = (line.strip() for line in text.splitlines())
+    return '\n'.join(
+        line for line in lines if line and not line.startswith('//')
+    )
+
+
+def minify(name, text):
+    if '.min.' in name:
+        return text
+    if name.endswith('.css'):
+        return minify_css(text)
+    return minify_js(text)
+
+
+#----------------------------------------------------------------------------#
+# Build.
+#----------------------------------------------------------------------------#
+
+
+def compress(data):
+    """
+    {extension: bytes} of the precompressed siblings worth serving.
+    Brotli requires the optional `brotli` package, gzip is used alone
+    without it.
+    """
+    siblings = {'.gz': gzip.compress(data, 9, mtime=0)}
+    try:
+        import brotli
+    except ImportError:
+        pass
+    else:
+        siblings['.br'] = brotli.compress(data, quality=11)
+    return {
+        extension: compressed for extension, compressed in siblings.items()
+        if len(compressed) < len(data)
+    }
+
+
+def bundle(static_folder, sources):
+    parts = list()
+    for source in sources:
+        with open(os.path.join(static_folder, source), encoding='utf-8') as f:
+            text = minify(source, f.read())
+        # A script without a trailing semicolon must not run into the next
+        parts.append(text if source.endswith('.css') else text + ';')
+    return '\n'.join(parts).encode('utf-8')
+
+
+def build(static_folder, bundles=BUNDLES):
+    """
+    Write every bundle to static/dist under a content hashed name, next to
+    its .gz and .br siblings, and the manifest mapping bundle names to
+    them. Returns the manifest.
+    """
+    dist = os.path.join(static_folder, DIST)
+    shutil.rmtree(dist, ignore_errors=True)
+    os.makedirs(dist)
+
+    manifest = dict()
+    for name, sources in bundles.items():
+        data = bundle(static_folder, sources)
+        stem, extension = os.path.splitext(name)
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        filename = f'{stem}.{digest}{extension}'
+        for suffix, content in {'': data, **compress(data)}.items():
+            with open(os.path.join(dist, filename + suffix), 'wb') as f:
+                f.write(content)
+        manifest[name] = f'{DIST}/{filename}'
+
+    with open(os.path.join(dist, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+#----------------------------------------------------------------------------#
+# Serving.
+#----------------------------------------------------------------------------#
+
+
+class Assets:
+    """
+    Template helper and static route for the built bundles.
+
+    `asset_urls(name)` lists the urls to load a bundle from: its hashed
+    file once `flask assets build` has run, otherwise its source files so
+    development needs no build. Hashed files are served with their
+    precompressed sibling matching Accept-Encoding and cached for a year
+    as immutable, a new build changing their names.
+    """
+
+    def __init__(self, app=None):
+        self.manifest = dict()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.manifest = self.load(app.static_folder)
+        app.jinja_env.globals['asset_urls'] = self.urls
+        app.view_functions['static'] = self.send_static
+        app.extensions['assets'] = self
+
+    @staticmethod
+    def load(static_folder):
+        try:
+            with open(os.path.join(static_folder, DIST, MANIFEST)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return dict()
+
+    def urls(self, name):
+        if name in self.manifest:
+            return [url_for('static', filename=self.manifest[name])]
+        return [
+            url_for('static', filename=source) for source in BUNDLES[name]
+        ]
+
+    def send_static(self, filename):
+        if not filename.startswith(DIST + '/'):
+            return current_app.send_static_file(filename)
+
+        static_folder = current_app.static_folder
+        mimetype = mimetypes.guess_type(filename)[0]
+        for encoding, extension in ENCODINGS:
+            if encoding in request.accept_encodings and os.path.isfile(
+                    os.path.join(static_folder, filename + extension)):
+                response = send_from_directory(
+                    static_folder, filename + extension, mimetype=mimetype
+                )
+                response.content_encoding = encoding
+                break
+        else:
+            response = send_from_directory(static_folder, filename)
+        response.headers['Cache-Control'] = IMMUTABLE
+        response.vary.add('Accept-Encoding')
+        return response
+
+
+assets = Assets()
+
+assets_command = AppGroup('assets', help='Build the static assets.')
+
+
+@assets_command.command('build')
+def build_command():
+    """Bundle, minify, fingerprint and precompress the static files into
+    static/dist, restart the app to serve them."""
+    manifest = build(current_app.static_folder)
+    for name, path in sorted(manifest.items()):
+        click.echo(f'{name} -> {path}')
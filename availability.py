@@ -0,0 +1,211 @@
+from datetime import date, datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import String, cast, tuple_
+from sqlalchemy.dialects import postgresql
+
+from cache import cache
+from importer import insert_ignoring_conflicts
+from models import db, Artist, Availability, AvailabilityRule
+
+#----------------------------------------------------------------------------#
+# Filters.
+#----------------------------------------------------------------------------#
+
+
+def plays_genre(genre):
+    """
+    Postgres answers array containment from the GIN index on
+    `artists.genres`. Other databases store genres as JSON lists, matched
+    on the quoted element.
+    """
+    if db.engine.dialect.name == 'postgresql':
+        return Artist.genres.op('@>')(postgresql.array([genre]))
+    return cast(Artist.genres, String).like(f'%"{genre}"%')
+
+
+#----------------------------------------------------------------------------#
+# Search.
+#----------------------------------------------------------------------------#
+
+# Keyset results are ordered and paginated on, matching the
+# (date, artist_id) index on availabilities
+AVAILABILITY_KEY = (Availability.date, Availability.artist_id)
+
+
+def encode_availability_cursor(available_date, artist_id):
+    return f'{available_date.isoformat()}_{artist_id}'
+
+
+def decode_availability_cursor(cursor):
+    """
+    Inverse of encode_availability_cursor, raises ValueError on malformed
+    cursors.
+    """
+    available_date, artist_id = cursor.split('_')
+    return date.fromisoformat(available_date), int(artist_id)
+
+
+class AvailableArtists:
+    """
+    One page of the artists available between `start` and `end`, both
+    included, optionally playing `genre` and based in `state`. Like
+    queries.UpcomingShows, rows are produced lazily and `next_cursor` is set
+    once iterated. Pages are read by a range scan of the (date, artist_id)
+    index, so deep pages cost the same as the first one.
+    """
+
+    def __init__(self, start, end, genre=None, state=None, after=None,
+                 per_page=30):
+        self.start = start
+        self.end = end
+        self.genre = genre
+        self.state = state
+        self.after = after
+        self.per_page = per_page
+        self.next_cursor = None
+
+    def query(self):
+        query = db.session.query(
+            *AVAILABILITY_KEY, Availability.time,
+            Artist.name, Artist.city, Artist.state, Artist.image_link
+        ).join(
+            Artist, Artist.id == Availability.artist_id
+        ).filter(
+            Availability.date.between(self.start, self.end)
+        )
+        if self.genre is not None:
+            query = query.filter(plays_genre(self.genre))
+        if self.state is not None:
+            query = query.filter(Artist.state == self.state)
+        if self.after is not None:
+            query = query.filter(
+                tuple_(*AVAILABILITY_KEY) > tuple_(*self.after)
+            )
+
+        # One extra row tells whether there is a next page
+        return query.order_by(*AVAILABILITY_KEY).limit(self.per_page + 1)
+
+    def __iter__(self):
+        for i, row in enumerate(self.query()):
+            (available_date, artist_id, available_time,
+             name, city, state, image_link) = row
+            if i == self.per_page:
+                self.next_cursor = encode_availability_cursor(*last)
+                break
+            last = (available_date, artist_id)
+
+            yield {
+                "artist_id": artist_id,
+                "artist_name": name,
+                "artist_image_link": image_link,
+                "city": city,
+                "state": state,
+                "start_time": datetime.combine(available_date, available_time)
+            }
+
+
+#----------------------------------------------------------------------------#
+# Recurring rules.
+#----------------------------------------------------------------------------#
+
+def weekday_mask(weekdays):
+    """
+    Bit mask of the weekdays, 0 being Monday as in `date.weekday()`.
+    """
+    return sum(1 << day for day in set(weekdays))
+
+
+def rule_dates(weekdays, start, end):
+    """
+    Dates from `start` to `end`, both included, falling on the weekdays of
+    the mask.
+    """
+    day = start
+    while day <= end:
+        if weekdays >> day.weekday() & 1:
+            yield day
+        day += timedelta(days=1)
+
+
+def materialize(until, artist_id=None, commit=True):
+    """
+    Insert the availabilities of the rules, optionally of a single artist,
+    that are not yet expanded up to `until`. Costs one indexed lookup when
+    there is nothing to do, otherwise the rows of every rule are inserted
+    by one executemany skipping the dates already listed, and committed.
+    With `commit=False` they are left in the current transaction, the
+    caller commits and invalidates 'availabilities' and the artist pages.
+    Returns the number of dates expanded.
+    """
+    query = AvailabilityRule.query.filter(
+        AvailabilityRule.materialized_until < until,
+        AvailabilityRule.materialized_until < AvailabilityRule.end_date
+    )
+    if artist_id is not None:
+        query = query.filter(AvailabilityRule.artist_id == artist_id)
+    rules = query.all()
+    if not rules:
+        return 0
+
+    rows = list()
+    for rule in rules:
+        end = min(rule.end_date, until)
+        rows.extend({
+            "artist_id": rule.artist_id, "date": day, "time": rule.time
+        } for day in rule_dates(
+            rule.weekdays, rule.materialized_until + timedelta(days=1), end
+        ))
+        rule.materialized_until = end
+    artist_ids = {rule.artist_id for rule in rules}
+
+    if rows:
+        db.session.execute(insert_ignoring_conflicts(Availability), rows)
+    if not commit:
+        return len(rows)
+    db.session.commit()
+    cache.invalidate(
+        'availabilities', *(f'artist:{id}' for id in artist_ids)
+    )
+    return len(rows)
+
+
+def add_rule(artist_id, weekdays, time, start, end, horizon):
+    """
+    Store a recurring availability, e.g. every Friday and Saturday at
+    20:00 from June to September, and insert its dates up to `horizon`
+    days from today. Later dates are inserted by the daily
+    `flask availability materialize` and when booked. Like `book_show`,
+    the caller commits. Returns the number of dates expanded.
+    """
+    db.session.add(AvailabilityRule(
+        artist_id=artist_id, weekdays=weekday_mask(weekdays), time=time,
+        start_date=start, end_date=end,
+        materialized_until=start - timedelta(days=1)
+    ))
+    db.session.flush()
+    return materialize(
+        date.today() + timedelta(days=horizon), artist_id=artist_id,
+        commit=False
+    )
+
+
+
+#----------------------------------------------------------------------------#
+# Commands.
+#----------------------------------------------------------------------------#
+
+availability_command = AppGroup(
+    'availability', help='Maintain the recurring availabilities.'
+)
+
+
+@availability_command.command('materialize')
+def materialize_command():
+    """Insert the dates of the recurring availabilities up to
+    AVAILABILITY_HORIZON_DAYS from today, run daily after midnight."""
+    horizon = current_app.config['AVAILABILITY_HORIZON_DAYS']
+    expanded = materialize(date.today() + timedelta(days=horizon))
+    click.echo(f'availabilities: {expanded} dates expanded')
@@ -0,0 +1,30 @@
+"""
+Offline benchmarks, run from the repository root, e.g.
+
+    python -m benchmarks.indexes --database-url sqlite:///bench.db
+
+The database URL defaults to $DATABASE_URL, then to a local SQLite file.
+"""
+import logging
+import os
+
+DEFAULT_DATABASE_URL = os.environ.get('DATABASE_URL', 'sqlite:///bench.db')
+
+
+def bench_app(database_url, cache_backend=None, **config):
+    """
+    The Fyyur app bound to the benchmark database, with CSRF checks off,
+    the given response cache backend and the profiler on, its slow query
+    warnings silenced. Other keyword arguments override config settings.
+    """
+    from app import create_app
+    config.setdefault('PROFILER_ENABLED', True)
+    app = create_app(
+        cli=False,
+        SQLALCHEMY_DATABASE_URI=database_url,
+        WTF_CSRF_ENABLED=False,
+        CACHE_BACKEND=cache_backend,
+        **config
+    )
+    logging.getLogger('fyyur.profiler').setLevel(logging.ERROR)
+    return app
@@ -0,0 +1,208 @@
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from time import perf_counter
+
+from benchmarks import DEFAULT_DATABASE_URL
+
+# Pages a new worker typically serves first, each with its own templates
+PATHS = (
+    '/', '/venues', '/artists', '/shows', '/venues/1', '/artists/1',
+    '/artists/available', '/venues/create'
+)
+
+# Ways a worker starts: compiling the templates on the first requests, with
+# the compiled templates cached on disk by earlier workers, or warmed up
+# before its first request as wsgi.py does
+MODES = ('cold', 'bytecode', 'warm')
+
+# Lines of `python -X importtime` for the modules app.py imports directly
+IMPORT_TIME = re.compile(
+    r'^import time:\s+\d+ \|\s+(\d+) \| {3}(\S+)$', re.M
+)
+
+#----------------------------------------------------------------------------#
+# Worker.
+#----------------------------------------------------------------------------#
+
+
+def child(options):
+    """
+    Run in a fresh interpreter: time importing app.py, creating the app,
+    warming it up and the first and second requests to each page. Prints
+    the timings as JSON.
+    """
+    start = perf_counter()
+    from app import create_app
+    result = {"import_ms": (perf_counter() - start) * 1000}
+
+    start = perf_counter()
+    app = create_app(
+        cli=False,
+        SQLALCHEMY_DATABASE_URI=options["database_url"],
+        JINJA_BYTECODE_CACHE_DIR=options["bytecode_cache_dir"],
+        WTF_CSRF_ENABLED=False,
+        CACHE_BACKEND=None,
+        FRAGMENT_CACHE_BACKEND=None
+    )
+    result["create_ms"] = (perf_counter() - start) * 1000
+
+    result["warmup_ms"] = 0
+    if options["warm"]:
+        from warmup import warm_up
+        start = perf_counter()
+        warm_up(app)
+        result["warmup_ms"] = (perf_counter() - start) * 1000
+
+    client = app.test_client()
+    for request in ('first', 'second'):
+        result[request] = dict()
+        for path in options["paths"]:
+            start = perf_counter()
+            client.get(path).get_data()
+            result[request][path] = (perf_counter() - start) * 1000
+    print(json.dumps(result))
+
+
+def spawn(options):
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.coldstart', '--child',
+         json.dumps(options)],
+        check=True, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+#----------------------------------------------------------------------------#
+# Benchmark.
+#----------------------------------------------------------------------------#
+
+
+def slowest_imports(count):
+    """
+    The modules app.py imports first, with the time importing each took
+    including its own imports, slowest first.
+    """
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'],
+        check=True, stderr=subprocess.PIPE, stdout=subprocess.DEVNULL,
+        text=True
+    ).stderr
+    imports = [
+        (name, int(cumulative) / 1000)
+        for cumulative, name in IMPORT_TIME.findall(stderr)
+    ]
+    return sorted(imports, key=lambda i: i[1], reverse=True)[:count]
+
+
+def run(mode, database_url, bytecode_cache_dir, repeat):
+    options = {
+        "database_url": database_url,
+        "bytecode_cache_dir": '' if mode == 'cold' else bytecode_cache_dir,
+        "warm": mode == 'warm',
+        "paths": PATHS
+    }
+    runs = [spawn(options) for _ in range(repeat)]
+
+    def median(*keys):
+        values = list()
+        for r in runs:
+            for key in keys:
+                r = r[key]
+            values.append(r)
+        return round(statistics.median(values), 3)
+
+    return {
+        "mode": mode,
+        "import_ms": median("import_ms"),
+        "create_ms": median("create_ms"),
+        "warmup_ms": median("warmup_ms"),
+        "first_ms": {path: median("first", path) for path in PATHS},
+        "second_ms": {path: median("second", path) for path in PATHS}
+    }
+
+
+def report(results, imports):
+    print(f'{"module imported by app.py":<32}{"ms":>10}')
+    print('-' * 42)
+    for name, ms in imports:
+        print(f'{name:<32}{ms:>10.1f}')
+    print()
+
+    header = f'{"mode":<10}{"import ms":>11}{"create ms":>11}' \
+             f'{"warm-up ms":>12}{"1st req ms":>12}{"2nd req ms":>12}'
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        print(f'{r["mode"]:<10}{r["import_ms"]:>11.1f}{r["create_ms"]:>11.1f}'
+              f'{r["warmup_ms"]:>12.1f}{sum(r["first_ms"].values()):>12.1f}'
+              f'{sum(r["second_ms"].values()):>12.1f}')
+    print()
+
+    header = f'{"first request":<22}' + ''.join(
+        f'{r["mode"] + " ms":>12}' for r in results
+    )
+    print(header)
+    print('-' * len(header))
+    for path in PATHS:
+        print(f'{path:<22}' + ''.join(
+            f'{r["first_ms"][path]:>12.1f}' for r in results
+        ))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Start fresh interpreters like new workers and time '
+                    'importing and creating the app and its first requests, '
+                    'without the bytecode cache, with it, and warmed up.'
+    )
+    parser.add_argument('--database-url', default=DEFAULT_DATABASE_URL)
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='workers started per mode')
+    parser.add_argument('--imports', type=int, default=10,
+                        help='slowest imports of app.py to list')
+    parser.add_argument('--no-seed', action='store_true',
+                        help='reuse the data already in the database')
+    parser.add_argument('--json', help='also write the results to this file')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return child(json.loads(args.child))
+
+    if not args.no_seed:
+        from models import db
+        from benchmarks import bench_app
+        from benchmarks.seed import seed
+        with bench_app(args.database_url).app_context():
+            db.drop_all()
+            db.create_all()
+            seed(venues=50, artists=100, shows=1000, availabilities=1000)
+            db.session.remove()
+
+    with tempfile.TemporaryDirectory() as bytecode_cache_dir:
+        # A first worker fills the cache the later ones load from
+        spawn({
+            "database_url": args.database_url,
+            "bytecode_cache_dir": bytecode_cache_dir, "warm": True,
+            "paths": []
+        })
+        results = [
+            run(mode, args.database_url, bytecode_cache_dir, args.repeat)
+            for mode in MODES
+        ]
+    imports = slowest_imports(args.imports)
+    report(results, imports)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"imports": dict(imports), "modes": results}, f,
+                      indent=2)
+
+
+if __name__ == '__main__':
+    main()
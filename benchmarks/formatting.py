@@ -0,0 +1,72 @@
+import argparse
+import timeit
+from datetime import datetime, timedelta
+
+import babel.dates
+import dateutil.parser
+
+import formatting
+
+#----------------------------------------------------------------------------#
+# Datetime filter.
+#----------------------------------------------------------------------------#
+
+
+def legacy_format_datetime(value, format='medium'):
+    # The filter as it was: dateutil parsing and Babel on every call
+    date = dateutil.parser.parse(value)
+    if format == 'full':
+        format = "EEEE MMMM, d, y 'at' h:mma"
+    elif format == 'medium':
+        format = "EE MM, dd, y h:mma"
+    return babel.dates.format_datetime(date, format, locale='en')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare the datetime template filter with the '
+                    'dateutil based one it replaced.'
+    )
+    parser.add_argument('--values', type=int, default=500,
+                        help='distinct show times, like a busy artist page')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    start = datetime(2026, 1, 1, 20)
+    values = [start + timedelta(days=i) for i in range(args.values)]
+    strings = [value.isoformat() for value in values]
+
+    def cold(items):
+        def run():
+            formatting.format_datetime.cache_clear()
+            for item in items:
+                formatting.format_datetime(item, 'full')
+        return run
+
+    def warm(items):
+        def run():
+            for item in items:
+                formatting.format_datetime(item, 'full')
+        return run
+
+    def legacy():
+        for item in strings:
+            legacy_format_datetime(item, 'full')
+
+    cases = [
+        ('legacy, ISO strings', legacy),
+        ('cold cache, ISO strings', cold(strings)),
+        ('cold cache, datetimes', cold(values)),
+        ('warm cache, datetimes', warm(values)),
+    ]
+    baseline = None
+    for name, run in cases:
+        best = min(timeit.repeat(run, number=1, repeat=args.repeat))
+        per_call = best / args.values * 1e6
+        baseline = baseline or per_call
+        print(f'{name:<26}{per_call:>10.2f} us/call'
+              f'{baseline / per_call:>8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+import argparse
+import statistics
+from datetime import date, time
+from time import perf_counter
+
+from sqlalchemy import Date, Time, bindparam, text
+
+from models import db, Show, Availability
+from benchmarks import DEFAULT_DATABASE_URL, bench_app
+from benchmarks.seed import seed
+
+#----------------------------------------------------------------------------#
+# Hot queries.
+#----------------------------------------------------------------------------#
+
+# Indexes under comparison, dropped for the 'before' run
+INDEXES = [
+    index for table in (Show.__table__, Availability.__table__)
+    for index in table.indexes
+    if index.name in (
+        'ix_shows_venue_id_show_date', 'ix_shows_artist_id_show_date',
+        'ix_shows_show_date_show_time', 'ix_availabilities_artist_id_date'
+    )
+]
+
+QUERIES = {
+    'venue upcoming shows': (
+        'SELECT show_date, show_time, artist_id FROM shows '
+        'WHERE venue_id = :venue_id AND show_date >= :today'
+    ),
+    'artist upcoming shows': (
+        'SELECT show_date, show_time, venue_id FROM shows '
+        'WHERE artist_id = :artist_id AND show_date >= :today'
+    ),
+    'venue upcoming show counts': (
+        'SELECT venue_id, count(*) FROM shows '
+        'WHERE show_date >= :today GROUP BY venue_id'
+    ),
+    'shows feed page': (
+        'SELECT show_date, show_time, venue_id, artist_id FROM shows '
+        'WHERE show_date >= :today '
+        'ORDER BY show_date, show_time, venue_id, artist_id LIMIT 30'
+    ),
+    'venue booking conflict': (
+        'SELECT 1 FROM shows '
+        'WHERE venue_id = :venue_id AND show_date = :today LIMIT 1'
+    ),
+    'artist availability': (
+        'SELECT date, time FROM availabilities '
+        'WHERE artist_id = :artist_id AND date = :today '
+        'AND time <= :show_time LIMIT 1'
+    ),
+}
+
+
+# Parameters that need a type for the driver to bind them
+PARAM_TYPES = {"today": Date(), "show_time": Time()}
+
+
+def statement(sql):
+    return text(sql).bindparams(*(
+        bindparam(name, type_=type_)
+        for name, type_ in PARAM_TYPES.items() if f':{name}' in sql
+    ))
+
+
+def explain(sql, params):
+    if db.engine.dialect.name == 'postgresql':
+        prefix = 'EXPLAIN (ANALYZE, BUFFERS) '
+    else:
+        prefix = 'EXPLAIN QUERY PLAN '
+    rows = db.session.execute(statement(prefix + sql), params)
+    return '\n'.join('    ' + ' '.join(map(str, row)) for row in rows)
+
+
+def timing(sql, params, repeat):
+    samples = list()
+    for _ in range(repeat):
+        start = perf_counter()
+        db.session.execute(statement(sql), params).fetchall()
+        samples.append((perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def run(label, params, repeat):
+    print(f'== {label}')
+    for name, sql in QUERIES.items():
+        print(f'{name}: {timing(sql, params, repeat):.3f} ms median')
+        print(explain(sql, params))
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare plans and timings of the hot shows and '
+                    'availabilities queries without and with the '
+                    'composite indexes.'
+    )
+    parser.add_argument('--database-url', default=DEFAULT_DATABASE_URL)
+    parser.add_argument('--shows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--no-seed', action='store_true',
+                        help='reuse the data already in the database')
+    args = parser.parse_args()
+
+    with bench_app(args.database_url).app_context():
+        if not args.no_seed:
+            db.drop_all()
+            db.create_all()
+            seed(venues=max(args.shows // 100, 1),
+                 artists=max(args.shows // 50, 1),
+                 shows=args.shows, availabilities=args.shows * 2)
+
+        params = {
+            "venue_id": 1, "artist_id": 1, "today": date.today(),
+            "show_time": time(23)
+        }
+
+        for index in INDEXES:
+            index.drop(db.engine, checkfirst=True)
+        db.session.execute(text('ANALYZE'))
+        run('before', params, args.repeat)
+
+        for index in INDEXES:
+            index.create(db.engine, checkfirst=True)
+        db.session.execute(text('ANALYZE'))
+        run('after', params, args.repeat)
+        db.session.commit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+import argparse
+import json
+from datetime import date, time
+
+from sqlalchemy import text
+
+import partitions
+from models import db
+from benchmarks import DEFAULT_DATABASE_URL, bench_app
+from benchmarks.indexes import QUERIES, timing
+from benchmarks.seed import seed
+
+# Queries on upcoming shows, which should not slow down as history grows
+UPCOMING = (
+    'venue upcoming shows', 'artist upcoming shows', 'shows feed page',
+    'venue booking conflict'
+)
+
+FUTURE_DAYS = 365
+
+
+def run(years, shows_per_day, venues, keep, repeat):
+    past_days = 365 * years
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+    seed(venues=venues, artists=venues * 2,
+         shows=shows_per_day * (past_days + FUTURE_DAYS),
+         availabilities=venues * 10, past_days=past_days,
+         future_days=FUTURE_DAYS)
+
+    result = {"history_years": years}
+    if partitions.is_partitioned():
+        # Split the seeded rows out of the default partition
+        partitions.create_ahead(3)
+        db.session.commit()
+        if keep is not None:
+            for partition in partitions.archivable(keep):
+                partitions.archive(*partition)
+            db.session.commit()
+        result["partitions"] = len(partitions.partitions())
+        result["archived"] = len(partitions.partitions(partitions.ARCHIVE))
+    db.session.execute(text('ANALYZE'))
+    result["shows"] = db.session.execute(
+        text('SELECT count(*) FROM shows')
+    ).scalar()
+
+    params = {
+        "venue_id": 1, "artist_id": 1, "today": date.today(),
+        "show_time": time(23)
+    }
+    result["median_ms"] = {
+        name: round(timing(QUERIES[name], params, repeat), 3)
+        for name in UPCOMING
+    }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Time the upcoming shows queries as the years of past '
+                    'shows grow, the number of upcoming shows staying the '
+                    'same. On Postgres shows is partitioned by month, '
+                    'elsewhere this is the unpartitioned baseline.'
+    )
+    parser.add_argument('--database-url', default=DEFAULT_DATABASE_URL)
+    parser.add_argument('--years', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--shows-per-day', type=int, default=100)
+    parser.add_argument('--venues', type=int, default=200)
+    parser.add_argument('--keep', type=int,
+                        help='also archive partitions older than this many '
+                             'months')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    results = list()
+    with bench_app(args.database_url).app_context():
+        header = f'{"years":>6}{"shows":>10}' + ''.join(
+            f'{name[:22]:>24}' for name in UPCOMING
+        )
+        print(header)
+        print('-' * len(header))
+        for years in args.years:
+            r = run(years, args.shows_per_day, args.venues, args.keep,
+                    args.repeat)
+            results.append(r)
+            print(f'{years:>6}{r["shows"]:>10}' + ''.join(
+                f'{r["median_ms"][name]:>21.3f} ms' for name in UPCOMING
+            ))
+        if not partitions.is_partitioned():
+            print('shows is not partitioned on this database, the timings '
+                  'are the unpartitioned baseline')
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+import argparse
+import json
+import random
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from models import db
+from benchmarks import DEFAULT_DATABASE_URL, bench_app
+from benchmarks.seed import seed
+from engine import metrics
+
+# Read only pages, each taking a connection for the length of the request
+PATHS = ['/venues', '/artists', '/shows', '/venues/{id}', '/artists/{id}']
+
+
+def run(app, requests, concurrency, rng):
+    client = app.test_client()
+    paths = [
+        rng.choice(PATHS).format(id=rng.randint(1, 50))
+        for _ in range(requests)
+    ]
+
+    def one(path):
+        start = perf_counter()
+        response = client.get(path)
+        response.get_data()
+        return perf_counter() - start, response.status_code
+
+    metrics.reset()
+    start = perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(one, paths))
+    elapsed = perf_counter() - start
+
+    latencies = sorted(latency * 1000 for latency, _ in results)
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": sum(status >= 500 for _, status in results),
+        "throughput_rps": round(requests / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(latencies[int(len(latencies) * .95)], 3),
+        "pool": metrics.snapshot(db.engine.pool)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Load the read routes from concurrent threads and '
+                    'report how connections are reused and waited for.'
+    )
+    parser.add_argument('--database-url', default=DEFAULT_DATABASE_URL)
+    parser.add_argument('--pool-size', type=int, default=5)
+    parser.add_argument('--max-overflow', type=int, default=10)
+    parser.add_argument('--concurrency', type=int, nargs='+',
+                        default=[1, 4, 16, 32])
+    parser.add_argument('--requests', type=int, default=500,
+                        help='requests per concurrency level')
+    parser.add_argument('--no-seed', action='store_true',
+                        help='reuse the data already in the database')
+    parser.add_argument('--json', help='also write the results to this file')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    app = bench_app(args.database_url, DB_POOL_SIZE=args.pool_size,
+                    DB_MAX_OVERFLOW=args.max_overflow)
+    with app.app_context():
+        if not args.no_seed:
+            db.drop_all()
+            db.create_all()
+            seed(venues=50, artists=50, shows=1000, availabilities=1000,
+                 seed=args.seed)
+        db.session.remove()
+
+        results = list()
+        header = f'{"threads":>8}{"req/s":>9}{"p50 ms":>9}{"p95 ms":>9}' \
+                 f'{"connects":>10}{"checkouts":>11}{"reuse":>7}' \
+                 f'{"peak":>6}{"wait p95":>10}{"timeouts":>10}'
+        print(header)
+        print('-' * len(header))
+        for concurrency in args.concurrency:
+            r = run(app, args.requests, concurrency, random.Random(args.seed))
+            results.append(r)
+            pool, wait = r["pool"], r["pool"]["wait_ms"] or {"p95": 0}
+            print(f'{concurrency:>8}{r["throughput_rps"]:>9.1f}'
+                  f'{r["p50_ms"]:>9.2f}{r["p95_ms"]:>9.2f}'
+                  f'{pool["connects"]:>10}{pool["checkouts"]:>11}'
+                  f'{pool["reuse_ratio"] or 0:>7.2f}'
+                  f'{pool["max_checked_out"]:>6}{wait["p95"]:>10.2f}'
+                  f'{pool["timeouts"]:>10}')
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
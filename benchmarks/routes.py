@@ -0,0 +1,349 @@
+import argparse
+import json
+import logging
+import random
+import statistics
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from itertools import count
+from time import perf_counter
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+from werkzeug.serving import make_server
+
+from models import db, Venue, Artist, Availability
+from benchmarks import DEFAULT_DATABASE_URL, bench_app
+from benchmarks.seed import seed
+
+#----------------------------------------------------------------------------#
+# Routes.
+#----------------------------------------------------------------------------#
+
+
+class Route:
+    """
+    A route of app.py to benchmark. `request` builds the
+    (method, path, form data) of each request from the benchmark context.
+    """
+
+    def __init__(self, name, endpoint, request):
+        self.name = name
+        self.endpoint = endpoint
+        self.request = request
+
+
+def venue_form(ctx):
+    n = next(ctx.serial)
+    return {
+        "name": f'Bench Venue {n}', "city": 'San Francisco', "state": 'CA',
+        "address": f'{n} Bench Street', "phone": '415-555-0100',
+        "genres": ['Jazz', 'Blues'], "seeking_description": ''
+    }
+
+
+def artist_form(ctx):
+    n = next(ctx.serial)
+    return {
+        "name": f'Bench Artist {n}', "city": 'San Francisco', "state": 'CA',
+        "phone": f'415-555-{n % 10000:04d}', "genres": ['Jazz'],
+        "seeking_description": ''
+    }
+
+
+def show_form(ctx):
+    artist_id, available = ctx.rng.choice(ctx.availabilities)
+    return {
+        "artist_id": artist_id, "venue_id": ctx.venue_id(),
+        "start_time": available.strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+
+def availability_form(ctx):
+    start = datetime.combine(
+        date.today() + timedelta(days=ctx.rng.randint(1, 365)),
+        datetime.min.time()
+    ) + timedelta(hours=ctx.rng.randint(12, 20))
+    return {"start_time": start.strftime('%Y-%m-%d %H:%M:%S')}
+
+
+def availability_rule_form(ctx):
+    # Expanded up to AVAILABILITY_HORIZON_DAYS when added
+    start = date.today() + timedelta(days=ctx.rng.randint(0, 60))
+    return {
+        "weekdays": [str(day) for day in ctx.rng.sample(range(7), 2)],
+        "time": f'{ctx.rng.randint(12, 20)}:00',
+        "start_date": start.isoformat(),
+        "end_date": (
+            start + timedelta(days=ctx.rng.randint(30, 365))
+        ).isoformat()
+    }
+
+
+def search_form(ctx):
+    return {"search_term": ctx.rng.choice(['a', 'ven', 'artist 1', '12'])}
+
+
+def city_state_form(ctx):
+    return {"search_term": ctx.rng.choice(ctx.areas)}
+
+
+def available_filters(ctx):
+    start = date.today() + timedelta(days=ctx.rng.randint(0, 60))
+    return {
+        "start": start.isoformat(),
+        "end": (start + timedelta(days=14)).isoformat(),
+        "genre": ctx.rng.choice(['Jazz', 'Blues', 'RocknRoll', '']),
+        "state": ctx.rng.choice(['CA', 'NY', ''])
+    }
+
+
+ROUTES = [
+    Route('home', 'index', lambda ctx: ('GET', '/', None)),
+    Route('venues', 'venues', lambda ctx: ('GET', '/venues', None)),
+    Route('artists', 'artists', lambda ctx: ('GET', '/artists', None)),
+    Route('shows', 'shows', lambda ctx: ('GET', '/shows', None)),
+    Route('show venue', 'show_venue',
+          lambda ctx: ('GET', f'/venues/{ctx.venue_id()}', None)),
+    Route('show artist', 'show_artist',
+          lambda ctx: ('GET', f'/artists/{ctx.artist_id()}', None)),
+    Route('search venues', 'search_venues',
+          lambda ctx: ('POST', '/venues/search', search_form(ctx))),
+    Route('search venues by city, state', 'search_venues_by_city_state',
+          lambda ctx: ('POST', '/venues/searchbycitystate',
+                       city_state_form(ctx))),
+    Route('search artists', 'search_artists',
+          lambda ctx: ('POST', '/artists/search', search_form(ctx))),
+    Route('search artists by city, state', 'search_artists_by_city_state',
+          lambda ctx: ('POST', '/artists/searchbycitystate',
+                       city_state_form(ctx))),
+    Route('available artists', 'available_artists',
+          lambda ctx: ('GET', '/artists/available?' + urlencode(
+              available_filters(ctx)), None)),
+    Route('new venue form', 'create_venue_form',
+          lambda ctx: ('GET', '/venues/create', None)),
+    Route('new artist form', 'create_artist_form',
+          lambda ctx: ('GET', '/artists/create', None)),
+    Route('new show form', 'create_shows',
+          lambda ctx: ('GET', '/shows/create', None)),
+    Route('edit venue form', 'edit_venue',
+          lambda ctx: ('GET', f'/venues/{ctx.venue_id()}/edit', None)),
+    Route('edit artist form', 'edit_artist',
+          lambda ctx: ('GET', f'/artists/{ctx.artist_id()}/edit', None)),
+    Route('new availability form', 'add_availability',
+          lambda ctx: ('GET', f'/artists/{ctx.artist_id()}/add_availability',
+                       None)),
+    Route('create venue', 'create_venue_submission',
+          lambda ctx: ('POST', '/venues/create', venue_form(ctx))),
+    Route('create artist', 'create_artist_submission',
+          lambda ctx: ('POST', '/artists/create', artist_form(ctx))),
+    Route('create show', 'create_show_submission',
+          lambda ctx: ('POST', '/shows/create', show_form(ctx))),
+    Route('add availability', 'add_availability_submission',
+          lambda ctx: ('POST',
+                       f'/artists/{ctx.artist_id()}/add_availability',
+                       availability_form(ctx))),
+    Route('add availability rule', 'add_availability_rule_submission',
+          lambda ctx: ('POST',
+                       f'/artists/{ctx.artist_id()}/add_availability_rule',
+                       availability_rule_form(ctx))),
+    Route('edit venue', 'edit_venue_submission',
+          lambda ctx: ('POST', f'/venues/{ctx.venue_id()}/edit',
+                       venue_form(ctx))),
+    Route('edit artist', 'edit_artist_submission',
+          lambda ctx: ('POST', f'/artists/{ctx.artist_id()}/edit',
+                       artist_form(ctx))),
+    # Last, deletes venues from the top of the id range
+    Route('delete venue', 'delete_venue',
+          lambda ctx: ('DELETE', f'/venues/{ctx.deleted_venue_id()}/delete',
+                       None)),
+]
+
+
+class Context:
+    """
+    Ids and values the request builders draw from, read once from the
+    seeded database.
+    """
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.lock = threading.Lock()
+        self.serial = count(1)
+        self.max_venue_id = db.session.query(db.func.max(Venue.id)).scalar()
+        self.max_artist_id = db.session.query(
+            db.func.max(Artist.id)).scalar()
+        self.next_deleted = self.max_venue_id
+        self.areas = [
+            f'{city}, {state}' for (city, state) in db.session.query(
+                Venue.city, Venue.state).distinct().limit(100)
+        ]
+        self.availabilities = [
+            (artist_id, datetime.combine(available_date, available_time))
+            for (artist_id, available_date, available_time)
+            in db.session.query(
+                Availability.artist_id, Availability.date, Availability.time
+            ).filter(Availability.date >= date.today()).limit(1000)
+        ]
+
+    def venue_id(self):
+        with self.lock:
+            return self.rng.randint(1, self.max_venue_id)
+
+    def artist_id(self):
+        with self.lock:
+            return self.rng.randint(1, self.max_artist_id)
+
+    def deleted_venue_id(self):
+        with self.lock:
+            self.next_deleted -= 1
+            return self.next_deleted + 1
+
+
+#----------------------------------------------------------------------------#
+# Clients.
+#----------------------------------------------------------------------------#
+
+
+def test_client_request(client):
+    def send(method, path, data):
+        response = client.open(path, method=method, data=data)
+        response.get_data()
+        return response.status_code
+    return send
+
+
+def http_request(base_url):
+    def send(method, path, data):
+        body = urlencode(data, doseq=True).encode() if data else None
+        request = Request(base_url + path, data=body, method=method)
+        try:
+            with urlopen(request) as response:
+                response.read()
+                return response.status
+        except HTTPError as error:
+            return error.code
+    return send
+
+
+#----------------------------------------------------------------------------#
+# Benchmark.
+#----------------------------------------------------------------------------#
+
+
+def percentile(samples, p):
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method='inclusive')[p - 1]
+
+
+def bench_route(route, send, ctx, profiler, requests, concurrency):
+    profiler.history = deque()
+    latencies, failures = list(), 0
+
+    def one(_):
+        method, path, data = route.request(ctx)
+        start = perf_counter()
+        status = send(method, path, data)
+        return perf_counter() - start, status
+
+    start = perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        for elapsed, status in pool.map(one, range(requests)):
+            latencies.append(elapsed * 1000)
+            failures += status >= 500
+    elapsed = perf_counter() - start
+
+    statements = [
+        profile["statements"] for profile in profiler.history
+        if profile["endpoint"] == route.endpoint
+    ] or [0]
+
+    return {
+        "route": route.name,
+        "requests": requests,
+        "errors": failures,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "throughput_rps": round(requests / elapsed, 1),
+        "queries_mean": round(statistics.mean(statements), 2),
+        "queries_max": max(statements)
+    }
+
+
+def report(results):
+    header = f'{"route":<32}{"req":>6}{"err":>5}{"p50 ms":>10}' \
+             f'{"p95 ms":>10}{"p99 ms":>10}{"req/s":>9}{"queries":>9}'
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        print(f'{r["route"]:<32}{r["requests"]:>6}{r["errors"]:>5}'
+              f'{r["p50_ms"]:>10.2f}{r["p95_ms"]:>10.2f}{r["p99_ms"]:>10.2f}'
+              f'{r["throughput_rps"]:>9.1f}{r["queries_mean"]:>9.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Seed a synthetic catalogue and report latency '
+                    'percentiles, throughput and statements per request '
+                    'for every route of the app.'
+    )
+    parser.add_argument('--database-url', default=DEFAULT_DATABASE_URL)
+    parser.add_argument('--shows', type=int, default=10000,
+                        help='number of shows to seed, 10k to 1M')
+    parser.add_argument('--requests', type=int, default=100,
+                        help='requests per route')
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--server', action='store_true',
+                        help='go through a local WSGI server over HTTP '
+                             'instead of the Flask test client')
+    parser.add_argument('--cache', choices=['lru', 'local', 'redis'],
+                        help='response cache backend, off by default')
+    parser.add_argument('--routes', nargs='*',
+                        help='names of the routes to run, all by default')
+    parser.add_argument('--no-seed', action='store_true',
+                        help='reuse the data already in the database')
+    parser.add_argument('--json', help='also write the results to this file')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    app = bench_app(args.database_url, cache_backend=args.cache)
+    profiler = app.extensions['profiler']
+
+    with app.app_context():
+        if not args.no_seed:
+            db.drop_all()
+            db.create_all()
+            seed(venues=max(args.shows // 20, 1),
+                 artists=max(args.shows // 10, 1),
+                 shows=args.shows, availabilities=args.shows,
+                 seed=args.seed)
+        ctx = Context(random.Random(args.seed))
+        db.session.remove()
+
+    if args.server:
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        send = http_request(f'http://127.0.0.1:{server.server_port}')
+    else:
+        send = test_client_request(app.test_client())
+
+    results = [
+        bench_route(route, send, ctx, profiler, args.requests,
+                    args.concurrency)
+        for route in ROUTES if not args.routes or route.name in args.routes
+    ]
+    report(results)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
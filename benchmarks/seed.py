@@ -0,0 +1,154 @@
+import argparse
+import random
+from collections import Counter
+from datetime import date, time, timedelta
+
+import counters
+from enums import Genre, State
+from models import db, Venue, Artist, Show, Availability
+from benchmarks import DEFAULT_DATABASE_URL, bench_app
+
+#----------------------------------------------------------------------------#
+# Synthetic data.
+#----------------------------------------------------------------------------#
+
+# Stored by name, as the forms post them and the filters match them
+GENRES = [genre.name for genre in Genre]
+STATES = [state.name for state in State]
+
+BATCH_SIZE = 10000
+
+
+def zipf_weights(n, s=1.1):
+    return [1 / (rank ** s) for rank in range(1, n + 1)]
+
+
+def insert(model, rows):
+    batch = list()
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            db.session.execute(model.__table__.insert(), batch)
+            batch.clear()
+    if batch:
+        db.session.execute(model.__table__.insert(), batch)
+
+
+def seed(venues=1000, artists=2000, shows=10000, availabilities=20000,
+         past_days=730, future_days=365, seed=0):
+    """
+    Insert a synthetic catalogue into an empty database. Genres, states and
+    artist bookings follow long tailed distributions, and every venue and
+    artist has at most one show a day, as create_show_submission requires.
+    """
+    rng = random.Random(seed)
+    genre_weights = zipf_weights(len(GENRES))
+    state_weights = zipf_weights(len(STATES), s=0.8)
+    today = date.today()
+    first_day = today - timedelta(days=past_days)
+    span = past_days + future_days
+
+    def place():
+        state = rng.choices(STATES, state_weights)[0]
+        return state, f'{state} City {int(rng.paretovariate(1.5)) % 50}'
+
+    def genres():
+        return sorted(set(rng.choices(
+            GENRES, genre_weights, k=rng.randint(1, 3)
+        )))
+
+    def venue(i):
+        state, city = place()
+        return {
+            "id": i, "name": f'Venue {i}', "genres": genres(),
+            "city": city, "state": state, "address": f'{i} Main Street',
+            "phone": f'555-{i // 10000:03d}-{i % 10000:04d}',
+            "seeking_talent": rng.random() < 0.3,
+            "seeking_description": None,
+            "image_link": f'https://example.com/venues/{i}.jpg'
+        }
+
+    def artist(i):
+        state, city = place()
+        return {
+            "id": i, "name": f'Artist {i}', "genres": genres(),
+            "city": city, "state": state,
+            "phone": f'555-{i // 10000:03d}-{i % 10000:04d}',
+            "seeking_venue": rng.random() < 0.5,
+            "seeking_description": None,
+            "image_link": f'https://example.com/artists/{i}.jpg'
+        }
+
+    insert(Venue, (venue(i) for i in range(1, venues + 1)))
+    insert(Artist, (artist(i) for i in range(1, artists + 1)))
+
+    # Popular artists play most of the shows
+    artist_ids = range(1, artists + 1)
+    artist_weights = zipf_weights(artists, s=0.9)
+
+    def shows_rows():
+        per_venue, remainder = divmod(min(shows, venues * span), venues)
+        booked, playing = set(), Counter()
+        for venue_id in range(1, venues + 1):
+            count = per_venue + (venue_id <= remainder)
+            bookers = rng.choices(artist_ids, artist_weights, k=count)
+            days = rng.sample(range(span), count)
+            for artist_id, day in zip(bookers, days):
+                if playing[day] == artists:
+                    continue  # every artist already plays that day
+                # Another artist when this one already plays that day
+                while (artist_id, day) in booked:
+                    artist_id = rng.choice(artist_ids)
+                booked.add((artist_id, day))
+                playing[day] += 1
+                yield {
+                    "artist_id": artist_id, "venue_id": venue_id,
+                    "show_date": first_day + timedelta(days=day),
+                    "show_time": time(rng.randint(17, 23))
+                }
+
+    def availabilities_rows():
+        per_artist, remainder = divmod(
+            min(availabilities, artists * future_days), artists
+        )
+        for artist_id in artist_ids:
+            count = per_artist + (artist_id <= remainder)
+            for day in rng.sample(range(future_days), count):
+                yield {
+                    "artist_id": artist_id,
+                    "date": today + timedelta(days=day),
+                    "time": time(rng.randint(12, 20))
+                }
+
+    insert(Show, shows_rows())
+    insert(Availability, availabilities_rows())
+    counters.rebuild()
+
+    # Ids were given explicitly, move the sequences past them
+    if db.engine.dialect.name == 'postgresql':
+        for table in ('venues', 'artists'):
+            db.session.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"(SELECT max(id) FROM {table}))"
+            )
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=seed.__doc__)
+    parser.add_argument('--database-url', default=DEFAULT_DATABASE_URL)
+    parser.add_argument('--venues', type=int, default=1000)
+    parser.add_argument('--artists', type=int, default=2000)
+    parser.add_argument('--shows', type=int, default=10000)
+    parser.add_argument('--availabilities', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with bench_app(args.database_url).app_context():
+        db.create_all()
+        seed(args.venues, args.artists, args.shows, args.availabilities,
+             seed=args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import select, tuple_
+from sqlalchemy.exc import IntegrityError
+
+import availability
+import counters
+from cache import cache
+from formatting import to_datetime
+from importer import READERS, insert_ignoring_conflicts
+from models import db, Venue, Artist, Show, Availability
+
+
+class BookingError(Exception):
+    """
+    Shows that cannot be booked, `errors` holds a message per show.
+    """
+
+    def __init__(self, errors):
+        super().__init__(' '.join(errors))
+        self.errors = errors
+
+
+#----------------------------------------------------------------------------#
+# Single shows.
+#----------------------------------------------------------------------------#
+
+
+def to_id(value):
+    return int(value) if str(value).isdigit() else None
+
+
+def probe(artist_id, venue_id, start_time):
+    """
+    Everything a booking depends on, answered in one statement by index
+    lookups: (artist name, venue name, artist available, artist booked,
+    venue booked).
+    """
+    return db.session.execute(select(
+        select(Artist.name).where(
+            Artist.id == artist_id).scalar_subquery(),
+        select(Venue.name).where(Venue.id == venue_id).scalar_subquery(),
+        select(Availability.artist_id).where(
+            Availability.artist_id == artist_id,
+            Availability.date == start_time.date(),
+            Availability.time <= start_time.time()
+        ).exists(),
+        select(Show.artist_id).where(
+            Show.artist_id == artist_id,
+            Show.show_date == start_time.date()
+        ).exists(),
+        select(Show.venue_id).where(
+            Show.venue_id == venue_id,
+            Show.show_date == start_time.date()
+        ).exists()
+    )).one()
+
+
+def book_show(artist_id, venue_id, start_time):
+    """
+    Add a show to the current transaction, the caller commits. Raises
+    BookingError when the artist or venue does not exist, the artist is
+    not available at `start_time` or the artist or venue already has a
+    show that day. The unique indexes on (artist_id, show_date) and
+    (venue_id, show_date) settle concurrent bookings of either.
+    """
+    artist_key, venue_key = to_id(artist_id), to_id(venue_id)
+    if artist_key is not None:
+        # Recurring availabilities may not be expanded that far yet
+        availability.materialize(
+            start_time.date(), artist_id=artist_key, commit=False
+        )
+    artist, venue, available, artist_booked, venue_booked = probe(
+        artist_key, venue_key, start_time
+    )
+    if artist is None:
+        raise BookingError([f'Artist with ID {artist_id} does not exist.'])
+    if venue is None:
+        raise BookingError([f'Venue with ID {venue_id} does not exist.'])
+    if not available:
+        raise BookingError([
+            f'{artist} is not available on '
+            f'{start_time:%Y-%m-%d %H:%M:%S}'
+        ])
+    if artist_booked:
+        raise BookingError([
+            f'{artist} has already a scheduled show on the '
+            f'{start_time.date()}'
+        ])
+
+    row = {
+        "artist_id": artist_key, "venue_id": venue_key,
+        "show_date": start_time.date(), "show_time": start_time.time()
+    }
+    if venue_booked:
+        raise BookingError([
+            f'{venue} has already a scheduled show on the '
+            f'{start_time.date()}'
+        ])
+    if not db.session.execute(insert_ignoring_conflicts(Show), row).rowcount:
+        raise BookingError([
+            f'{artist} or {venue} was booked meanwhile on the '
+            f'{start_time.date()}'
+        ])
+    counters.show_added(artist_key, venue_key, row["show_date"])
+    return row
+
+
+#----------------------------------------------------------------------------#
+# Line-ups.
+#----------------------------------------------------------------------------#
+
+
+def book_shows(bookings):
+    """
+    Book many (artist_id, venue_id, start_time) shows at once, checked
+    with one statement per lookup whatever their number and inserted with
+    one executemany. Either every show is added to the current transaction
+    or BookingError is raised with the reason of each one that cannot be.
+    Recurring availabilities are expanded up to the last show beforehand.
+    """
+    bookings = [
+        (to_id(artist_id), to_id(venue_id), start_time)
+        for artist_id, venue_id, start_time in bookings
+    ]
+    if not bookings:
+        return []
+    availability.materialize(
+        max(start_time.date() for _, _, start_time in bookings),
+        commit=False
+    )
+    artist_ids = {artist_id for artist_id, _, _ in bookings}
+    venue_ids = {venue_id for _, venue_id, _ in bookings}
+    days = {(venue_id, start_time.date())
+            for _, venue_id, start_time in bookings}
+    artist_days = {(artist_id, start_time.date())
+                   for artist_id, _, start_time in bookings}
+
+    artists = dict(db.session.query(Artist.id, Artist.name).filter(
+        Artist.id.in_(artist_ids)))
+    venues = dict(db.session.query(Venue.id, Venue.name).filter(
+        Venue.id.in_(venue_ids)))
+    availabilities = {
+        (artist_id, date): time for artist_id, date, time in db.session.query(
+            Availability.artist_id, Availability.date, Availability.time
+        ).filter(tuple_(Availability.artist_id, Availability.date).in_(
+            {(artist_id, start_time.date())
+             for artist_id, _, start_time in bookings}))
+    }
+    booked = set(db.session.query(Show.venue_id, Show.show_date).filter(
+        tuple_(Show.venue_id, Show.show_date).in_(days)))
+    playing = set(db.session.query(Show.artist_id, Show.show_date).filter(
+        tuple_(Show.artist_id, Show.show_date).in_(artist_days)))
+
+    rows, errors = list(), list()
+    for i, (artist_id, venue_id, start_time) in enumerate(bookings, start=1):
+        day = (venue_id, start_time.date())
+        artist_day = (artist_id, start_time.date())
+        available = availabilities.get((artist_id, start_time.date()))
+        if artist_id not in artists:
+            errors.append(f'#{i}: Artist with ID {artist_id} does not exist.')
+        elif venue_id not in venues:
+            errors.append(f'#{i}: Venue with ID {venue_id} does not exist.')
+        elif available is None or available > start_time.time():
+            errors.append(
+                f'#{i}: {artists[artist_id]} is not available on '
+                f'{start_time:%Y-%m-%d %H:%M:%S}'
+            )
+        elif artist_day in playing:
+            errors.append(
+                f'#{i}: {artists[artist_id]} has already a scheduled show on '
+                f'the {start_time.date()}'
+            )
+        elif day in booked:
+            errors.append(
+                f'#{i}: {venues[venue_id]} has already a scheduled show on '
+                f'the {start_time.date()}'
+            )
+        else:
+            # Also rules out two shows of the line-up at one venue, or of
+            # one artist, a day
+            booked.add(day)
+            playing.add(artist_day)
+            rows.append({
+                "artist_id": artist_id, "venue_id": venue_id,
+                "show_date": start_time.date(),
+                "show_time": start_time.time()
+            })
+
+    if errors:
+        raise BookingError(errors)
+    try:
+        db.session.execute(Show.__table__.insert(), rows)
+    except IntegrityError:
+        raise BookingError(
+            ['An artist or venue of the line-up was booked meanwhile.']
+        )
+    counters.shows_inserted(rows)
+    return rows
+
+
+@click.command('book')
+@click.argument('path', type=click.File())
+@click.option('--format', 'format_', type=click.Choice(list(READERS)),
+              default='csv', show_default=True)
+@with_appcontext
+def book_command(path, format_):
+    """Book a line-up of shows, rows of artist_id, venue_id and start_time,
+    all in one transaction or none of them."""
+    try:
+        bookings = [
+            (row['artist_id'], row['venue_id'],
+             to_datetime(row['start_time']))
+            for row in READERS[format_](path)
+        ]
+    except (KeyError, TypeError, ValueError) as error:
+        raise click.ClickException(f'Invalid line-up: {error!r}')
+
+    try:
+        rows = book_shows(bookings)
+        db.session.commit()
+    except BookingError as error:
+        db.session.rollback()
+        raise click.ClickException('\n'.join(error.errors))
+    cache.invalidate('venues', 'artists', 'shows', 'availabilities')
+    click.echo(f'{len(rows)} shows booked.')
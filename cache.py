@@ -0,0 +1,313 @@
+import pickle
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from functools import wraps
+
+from flask import Response, request, session
+
+#----------------------------------------------------------------------------#
+# Backends.
+#----------------------------------------------------------------------------#
+
+
+class LRUBackend:
+    """
+    Bounded in-process store, the least recently used entries are evicted
+    first once `max_entries` is reached, and entries set with a timeout
+    expire after that many seconds. Counters are kept apart from the
+    entries so they are never evicted.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.counters = Counter()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            try:
+                self.entries.move_to_end(key)
+            except KeyError:
+                return None
+            expires, value = self.entries[key]
+            if expires is not None and expires <= time.time():
+                del self.entries[key]
+                return None
+            return value
+
+    def get_counters(self, keys):
+        return [self.counters[key] for key in keys]
+
+    def set(self, key, value, timeout=None):
+        expires = time.time() + timeout if timeout else None
+        with self.lock:
+            self.entries[key] = (expires, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def incr(self, key):
+        with self.lock:
+            self.counters[key] += 1
+            return self.counters[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.counters.clear()
+
+
+class RedisBackend:
+    """
+    Store shared by every worker, backed by a Redis compatible server.
+    Requires the optional `redis` package.
+    """
+
+    def __init__(self, url, prefix='fyyur:'):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return None if value is None else pickle.loads(value)
+
+    def get_counters(self, keys):
+        values = self.client.mget([self.prefix + key for key in keys])
+        return [0 if value is None else int(value) for value in values]
+
+    def set(self, key, value, timeout=None):
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=timeout)
+
+    def incr(self, key):
+        return self.client.incr(self.prefix + key)
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + '*'):
+            self.client.delete(key)
+
+
+class SQLiteBackend:
+    """
+    Store shared by the worker processes of one host, in a SQLite file.
+    Each thread has its own connection. Once `max_entries` is exceeded the
+    least recently stored entries are pruned, every `prune_every` sets.
+    """
+
+    def __init__(self, path, max_entries=10000, prune_every=100):
+        self.path = path
+        self.max_entries = max_entries
+        self.prune_every = prune_every
+        self.sets = 0
+        self.local = threading.local()
+
+    @property
+    def connection(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path, timeout=5, isolation_level=None
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=OFF')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS entries '
+                '(key TEXT PRIMARY KEY, value BLOB, stored REAL, '
+                'expires REAL)'
+            )
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS counters '
+                '(key TEXT PRIMARY KEY, value INTEGER NOT NULL)'
+            )
+            self.local.connection = connection
+        return connection
+
+    def get(self, key):
+        row = self.connection.execute(
+            'SELECT value FROM entries WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)', (key, time.time())
+        ).fetchone()
+        return None if row is None else pickle.loads(row[0])
+
+    def get_counters(self, keys):
+        values = dict(self.connection.execute(
+            f'SELECT key, value FROM counters '
+            f'WHERE key IN ({", ".join("?" * len(keys))})', keys
+        ))
+        return [values.get(key, 0) for key in keys]
+
+    def set(self, key, value, timeout=None):
+        now = time.time()
+        self.connection.execute(
+            'INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)',
+            (key, pickle.dumps(value), now, timeout and now + timeout)
+        )
+        self.sets += 1
+        if self.sets % self.prune_every == 0:
+            self.connection.execute(
+                'DELETE FROM entries WHERE key IN (SELECT key FROM entries '
+                'ORDER BY stored DESC LIMIT -1 OFFSET ?)', (self.max_entries,)
+            )
+
+    def incr(self, key):
+        with self.connection as connection:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute(
+                'INSERT INTO counters VALUES (?, 1) ON CONFLICT (key) '
+                'DO UPDATE SET value = value + 1', (key,)
+            )
+            return connection.execute(
+                'SELECT value FROM counters WHERE key = ?', (key,)
+            ).fetchone()[0]
+
+    def clear(self):
+        self.connection.execute('DELETE FROM entries')
+        self.connection.execute('DELETE FROM counters')
+
+
+def make_backend(name, config, prefix='CACHE'):
+    """
+    The backend named 'lru', 'local' or 'redis', configured from the
+    settings starting with `prefix`, or None to disable caching.
+    """
+    if name == 'lru':
+        return LRUBackend(config.get(f'{prefix}_MAX_ENTRIES', 1024))
+    if name == 'local':
+        return SQLiteBackend(
+            config[f'{prefix}_LOCAL_PATH'],
+            config.get(f'{prefix}_MAX_ENTRIES', 1024)
+        )
+    if name == 'redis':
+        return RedisBackend(config['CACHE_REDIS_URL'])
+    return None
+
+
+#----------------------------------------------------------------------------#
+# Response cache.
+#----------------------------------------------------------------------------#
+
+
+class ResponseCache:
+    """
+    Caches the responses of GET views, keyed on the endpoint, its arguments
+    and query string.
+
+    Views are tagged with namespaces, which may refer to view arguments,
+    e.g. 'venue:{venue_id}'. Each namespace has a generation counter that is
+    part of the cache key, so invalidating a namespace only bumps its
+    counter and every entry tagged with it becomes unreachable, to be
+    evicted by the backend.
+    """
+
+    def __init__(self, app=None):
+        self.backend = None
+        self.timeout = None
+        self.hits = Counter()
+        self.misses = Counter()
+        self.subscribers = list()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.backend = make_backend(
+            app.config.get('CACHE_BACKEND'), app.config
+        )
+        self.timeout = app.config.get('CACHE_DEFAULT_TIMEOUT')
+        app.extensions['response_cache'] = self
+
+    def cached(self, *namespaces):
+        def decorator(view):
+            @wraps(view)
+            def wrapper(**kwargs):
+                # Pending flash messages are rendered into the page
+                if self.backend is None or '_flashes' in session:
+                    return view(**kwargs)
+
+                tags = [ns.format(**kwargs) for ns in namespaces]
+                generations = self.backend.get_counters(
+                    [f'generation:{tag}' for tag in tags]
+                )
+                key = ':'.join([
+                    'view', request.endpoint,
+                    *(f'{tag}@{generation}'
+                      for tag, generation in zip(tags, generations)),
+                    *(f'{name}={value}'
+                      for name, value in sorted(kwargs.items())),
+                    request.query_string.decode()
+                ])
+
+                entry = self.backend.get(key)
+                if entry is not None:
+                    self.hits[request.endpoint] += 1
+                    body, status, headers = entry
+                    return Response(body, status=status, headers=headers)
+
+                self.misses[request.endpoint] += 1
+                response = view(**kwargs)
+                if not isinstance(response, Response):
+                    response = Response(response)
+                if response.status_code != 200:
+                    return response
+                if response.is_streamed:
+                    # Stored once sent, buffering it would stop streaming
+                    response.response = self.tee(
+                        key, response, response.response
+                    )
+                else:
+                    self.store(key, response, response.get_data())
+
+                return response
+            return wrapper
+        return decorator
+
+    def store(self, key, response, body):
+        self.backend.set(key, (
+            body, response.status_code, list(response.headers)
+        ), timeout=self.timeout)
+
+    def tee(self, key, response, chunks):
+        """
+        Pass the chunks of a streamed response on as they are sent and store
+        the whole body after the last one. A response the client did not
+        read to the end is not stored.
+        """
+        body = list()
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode(response.charset)
+                body.append(chunk)
+                yield chunk
+        finally:
+            if hasattr(chunks, 'close'):
+                chunks.close()
+        self.store(key, response, b''.join(body))
+
+    def invalidate(self, *namespaces):
+        for subscriber in self.subscribers:
+            subscriber(*namespaces)
+        if self.backend is None:
+            return
+        for namespace in namespaces:
+            self.backend.incr(f'generation:{namespace}')
+
+    def subscribe(self, subscriber):
+        """
+        Also call `subscriber(*namespaces)` on every invalidation.
+        """
+        if subscriber not in self.subscribers:
+            self.subscribers.append(subscriber)
+
+    def stats(self):
+        return {
+            endpoint: {
+                "hits": self.hits[endpoint],
+                "misses": self.misses[endpoint]
+            } for endpoint in self.hits.keys() | self.misses.keys()
+        }
+
+
+cache = ResponseCache()
@@ -0,0 +1,183 @@
+import click
+from flask.cli import AppGroup
+from sqlalchemy import case, func, or_, select, union, update
+
+from cache import cache
+from models import db, Venue, Artist, Show, ArchivedShow
+from queries import SHOW_KEYS, today
+
+#----------------------------------------------------------------------------#
+# Counters.
+#----------------------------------------------------------------------------#
+
+# Venues and artists carry the number of their upcoming and past shows and
+# the date of their next one, so listings and searches need no COUNT over
+# shows. Inserts add to them in place, bulk changes recompute the counters
+# of the rows they touched, and a daily rollover moves the shows that
+# passed from upcoming to past.
+COUNTERS = ('upcoming_shows_count', 'past_shows_count', 'next_show_date')
+
+
+def computed(model, on):
+    """
+    {counter: correlated subquery} computing the counters of `model` rows
+    from their shows, as of the date `on`. Archived shows are all past.
+    """
+    key = SHOW_KEYS[model].key
+
+    def shows(column, *criteria, table=Show):
+        return select(column).where(
+            getattr(table, key) == model.id, *criteria
+        ).scalar_subquery()
+
+    return {
+        "upcoming_shows_count": shows(func.count(), Show.show_date >= on),
+        "past_shows_count": shows(func.count(), Show.show_date < on) +
+        shows(func.count(), table=ArchivedShow),
+        "next_show_date": shows(
+            func.min(Show.show_date), Show.show_date >= on
+        )
+    }
+
+
+def recompute(model, *criteria, on=None):
+    """
+    Recompute the counters of the `model` rows matching `criteria`, all of
+    them without criteria, in one UPDATE. Returns the number of rows.
+    """
+    statement = update(model).where(*criteria).values(
+        **computed(model, on or today())
+    ).execution_options(synchronize_session=False)
+    return db.session.execute(statement).rowcount
+
+
+def show_added(artist_id, venue_id, show_date, on=None):
+    """
+    Count a show just inserted, one UPDATE per side.
+    """
+    on = on or today()
+    for model, id in ((Artist, artist_id), (Venue, venue_id)):
+        if show_date < on:
+            values = {"past_shows_count": model.past_shows_count + 1}
+        else:
+            values = {
+                "upcoming_shows_count": model.upcoming_shows_count + 1,
+                "next_show_date": case(
+                    [(or_(model.next_show_date.is_(None),
+                          model.next_show_date > show_date), show_date)],
+                    else_=model.next_show_date
+                )
+            }
+        db.session.execute(
+            update(model).where(model.id == id).values(**values)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def shows_inserted(rows):
+    """
+    Recompute the counters of the venues and artists of bulk inserted
+    show rows, some of which may have been skipped as duplicates.
+    """
+    for model, key in ((Artist, 'artist_id'), (Venue, 'venue_id')):
+        ids = {row[key] for row in rows}
+        if ids:
+            recompute(model, model.id.in_(ids))
+
+
+def delete(entity):
+    """
+    Delete a venue or an artist along with its shows, recomputing the
+    counters of the artists or venues those were booked with.
+    """
+    model = type(entity)
+    other = Artist if model is Venue else Venue
+    key, other_key = SHOW_KEYS[model].key, SHOW_KEYS[other].key
+    other_ids = union(*(
+        select(getattr(table, other_key)).where(
+            getattr(table, key) == entity.id
+        ) for table in (Show, ArchivedShow)
+    ))
+    ids = [id for id, in db.session.execute(other_ids)]
+    db.session.delete(entity)
+    db.session.flush()
+    if ids:
+        recompute(other, other.id.in_(ids))
+
+
+def rollover(on=None):
+    """
+    Move the shows that passed before `on`, today by default, from upcoming
+    to past. Only the rows whose next show has passed are recomputed,
+    found through the index on next_show_date. Returns the number of rows
+    recomputed per table.
+    """
+    on = on or today()
+    return {
+        model.__tablename__: recompute(
+            model, model.next_show_date < on, on=on
+        ) for model in (Venue, Artist)
+    }
+
+
+def drift(model, on=None):
+    """
+    Ids of the `model` rows whose counters differ from their shows.
+    """
+    expected = computed(model, on or today())
+    query = select(model.id).where(or_(*(
+        getattr(model, counter).is_distinct_from(expected[counter])
+        for counter in COUNTERS
+    ))).order_by(model.id)
+    return [id for id, in db.session.execute(query)]
+
+
+def rebuild(on=None):
+    """
+    Recompute every counter in bulk, one UPDATE per table.
+    """
+    for model in (Venue, Artist):
+        recompute(model, on=on)
+
+
+#----------------------------------------------------------------------------#
+# Commands.
+#----------------------------------------------------------------------------#
+
+counters_command = AppGroup(
+    'counters', help='Maintain the show counters of venues and artists.'
+)
+
+
+@counters_command.command('rollover')
+def rollover_command():
+    """Move the shows that passed from upcoming to past, run daily after
+    midnight."""
+    recomputed = rollover()
+    db.session.commit()
+    # The shows that passed are no longer upcoming on any page
+    cache.invalidate('venues', 'artists', 'shows')
+    for table, count in recomputed.items():
+        click.echo(f'{table}: {count} rows rolled over')
+
+
+@counters_command.command('check')
+@click.option('--fix', is_flag=True,
+              help='Rebuild every counter when any has drifted.')
+def check_command(fix):
+    """Compare the counters with the shows and report the rows that
+    drifted."""
+    drifted = {model: drift(model) for model in (Venue, Artist)}
+    for model, ids in drifted.items():
+        listed = ', '.join(map(str, ids[:20])) + (', ...' * (len(ids) > 20))
+        click.echo(f'{model.__tablename__}: {len(ids)} rows drifted'
+                   + (f' ({listed})' if ids else ''))
+
+    if not any(drifted.values()):
+        return
+    if not fix:
+        raise SystemExit(1)
+    rebuild()
+    db.session.commit()
+    cache.invalidate('venues', 'artists')
+    click.echo('Counters rebuilt.')
@@ -0,0 +1,167 @@
+import threading
+from collections import deque
+from time import perf_counter
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool, Pool, QueuePool
+
+#----------------------------------------------------------------------------#
+# Metrics.
+#----------------------------------------------------------------------------#
+
+
+class PoolMetrics:
+    """
+    Connection pool counters fed by SQLAlchemy pool events, and by
+    InstrumentedQueuePool for the time spent waiting for a connection.
+    """
+
+    def __init__(self, samples=1000):
+        self.lock = threading.Lock()
+        self.waits = deque(maxlen=samples)
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.connects = 0
+            self.checkouts = 0
+            self.checked_out = 0
+            self.max_checked_out = 0
+            self.invalidations = 0
+            self.timeouts = 0
+            self.waits.clear()
+
+    def on_connect(self, dbapi_connection, connection_record):
+        with self.lock:
+            self.connects += 1
+
+    def on_checkout(self, dbapi_connection, connection_record,
+                    connection_proxy):
+        with self.lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.max_checked_out = max(self.max_checked_out, self.checked_out)
+
+    def on_checkin(self, dbapi_connection, connection_record):
+        with self.lock:
+            self.checked_out -= 1
+
+    def on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self.lock:
+            self.invalidations += 1
+
+    def record_wait(self, elapsed, timed_out=False):
+        with self.lock:
+            self.waits.append(elapsed)
+            self.timeouts += timed_out
+
+    def snapshot(self, pool=None):
+        with self.lock:
+            waits = sorted(self.waits)
+            summary = {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checked_out": self.checked_out,
+                "max_checked_out": self.max_checked_out,
+                # Checkouts served by an already open connection
+                "reuse_ratio": round(
+                    1 - self.connects / self.checkouts, 3
+                ) if self.checkouts else None,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "wait_ms": {
+                    "samples": len(waits),
+                    "p50": round(waits[len(waits) // 2] * 1000, 3),
+                    "p95": round(waits[int(len(waits) * .95)] * 1000, 3),
+                    "max": round(waits[-1] * 1000, 3)
+                } if waits else None
+            }
+        if isinstance(pool, QueuePool):
+            summary.update({
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow()
+            })
+        elif pool is not None:
+            summary["status"] = pool.status()
+        return summary
+
+
+metrics = PoolMetrics()
+
+for name, listener in (('connect', metrics.on_connect),
+                       ('checkout', metrics.on_checkout),
+                       ('checkin', metrics.on_checkin),
+                       ('invalidate', metrics.on_invalidate)):
+    event.listen(Pool, name, listener)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool recording how long each checkout waited for a connection,
+    including the time to open a new one.
+    """
+
+    def _do_get(self):
+        start = perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            metrics.record_wait(perf_counter() - start, timed_out=True)
+            raise
+        metrics.record_wait(perf_counter() - start)
+        return connection
+
+
+#----------------------------------------------------------------------------#
+# Engine options.
+#----------------------------------------------------------------------------#
+
+
+def engine_options(config):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS from the DB_* settings.
+
+    Each worker process holds a pool of DB_POOL_SIZE connections, plus up
+    to DB_MAX_OVERFLOW more under load. Connections are recycled after
+    DB_POOL_RECYCLE seconds and, with DB_POOL_PRE_PING, tested on checkout
+    so a restarted Postgres costs a reconnect rather than an error.
+
+    Behind PgBouncer in transaction mode (DB_PGBOUNCER) PgBouncer does the
+    pooling: connections are not kept, so NullPool is used, and psycopg 3
+    must not prepare statements, which would not exist on the next server
+    connection.
+    """
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    options = dict()
+
+    if url.get_backend_name() == 'sqlite':
+        if url.database in (None, '', ':memory:'):
+            # Flask-SQLAlchemy keeps in memory databases on one connection
+            return options
+        options['connect_args'] = {"check_same_thread": False}
+
+    if config.get('DB_PGBOUNCER'):
+        options['poolclass'] = NullPool
+        if url.get_driver_name() == 'psycopg':
+            options['connect_args'] = {"prepare_threshold": None}
+        return options
+
+    options.update({
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": config.get('DB_POOL_SIZE', 5),
+        "max_overflow": config.get('DB_MAX_OVERFLOW', 10),
+        "pool_timeout": config.get('DB_POOL_TIMEOUT', 30),
+        "pool_recycle": config.get('DB_POOL_RECYCLE', -1),
+        "pool_pre_ping": config.get('DB_POOL_PRE_PING', False)
+    })
+    return options
+
+
+def configure(app):
+    """
+    Set SQLALCHEMY_ENGINE_OPTIONS, before the engine is first used.
+    """
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+    app.extensions['pool_metrics'] = metrics
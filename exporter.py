@@ -0,0 +1,225 @@
+import csv
+import hmac
+import io
+import json
+from datetime import date
+
+import click
+from flask import Blueprint, Response, abort, current_app, request, \
+    stream_with_context
+from flask.cli import with_appcontext
+from sqlalchemy import select, union_all
+
+from models import db, Venue, Artist, Show, ArchivedShow
+
+#----------------------------------------------------------------------------#
+# Rows.
+#----------------------------------------------------------------------------#
+
+ENTITIES = {
+    'venues': Venue,
+    'artists': Artist,
+    'shows': Show
+}
+
+# Columns worth a dictionary encoding in the columnar format
+DICTIONARY_COLUMNS = ('state', 'genres')
+
+
+def columns(model):
+    return [column.name for column in model.__table__.columns]
+
+
+def all_shows(since=None):
+    """
+    Shows, archived ones included, from the `since` date onwards as a
+    subquery. Like queries.shows_of, each side of the UNION ALL is
+    filtered on its own.
+    """
+    sides = list()
+    for model in (Show, ArchivedShow):
+        side = select(*(getattr(model, name) for name in columns(Show)))
+        if since is not None:
+            side = side.where(model.show_date >= since)
+        sides.append(side)
+    return union_all(*sides).subquery()
+
+
+def export_rows(entity, since_id=None, since=None, batch_size=1000):
+    """
+    Rows of the entity as tuples, read through a server side cursor in
+    batches of `batch_size` so memory stays flat. Venues and artists can
+    be exported incrementally after `since_id`, shows from the `since`
+    date onwards.
+    """
+    model = ENTITIES[entity]
+    key = model.__table__.primary_key.columns
+    if model is Show:
+        shows = all_shows(since)
+        query = db.session.query(*shows.c)
+        key = [shows.c[column.name] for column in key]
+    else:
+        query = db.session.query(*model.__table__.columns)
+    if since_id is not None and hasattr(model, 'id'):
+        query = query.filter(model.id > since_id)
+
+    return query.order_by(*key).yield_per(batch_size)
+
+
+def plain(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+#----------------------------------------------------------------------------#
+# Writers.
+#----------------------------------------------------------------------------#
+
+
+def csv_value(value):
+    """
+    Cell as `flask import` reads it back: lists separated by ';' and
+    booleans as the form would post them.
+    """
+    if isinstance(value, list):
+        return ';'.join(value)
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return plain(value)
+
+
+def write_csv(names, rows, chunk_size=1000):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    for i, row in enumerate(rows, start=1):
+        writer.writerow([csv_value(value) for value in row])
+        if i % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def write_ndjson(names, rows):
+    for row in rows:
+        yield json.dumps(
+            dict(zip(names, map(plain, row))), separators=(',', ':')
+        ) + '\n'
+
+
+def encode_dictionary(values):
+    """
+    Dictionary encoding of a column, list values (genres) become lists of
+    indices.
+    """
+    dictionary, indices = dict(), list()
+
+    def index(value):
+        return dictionary.setdefault(value, len(dictionary))
+
+    for value in values:
+        if isinstance(value, list):
+            indices.append([index(item) for item in value])
+        else:
+            indices.append(index(value))
+    return {"dictionary": list(dictionary), "indices": indices}
+
+
+def write_columnar(names, rows, group_size=10000):
+    """
+    NDJSON columnar format: a header line, then one line per group of
+    `group_size` rows holding each column as a list, with `state` and
+    `genres` dictionary encoded.
+    """
+    yield json.dumps({
+        "format": "fyyur-columnar", "version": 1, "columns": names
+    }) + '\n'
+
+    def group(rows):
+        data = {}
+        for name, values in zip(names, zip(*rows)):
+            if name in DICTIONARY_COLUMNS:
+                data[name] = encode_dictionary(values)
+            else:
+                data[name] = [plain(value) for value in values]
+        return json.dumps(
+            {"rows": len(rows), "columns": data}, separators=(',', ':')
+        ) + '\n'
+
+    batch = list()
+    for row in rows:
+        batch.append(row)
+        if len(batch) == group_size:
+            yield group(batch)
+            batch.clear()
+    if batch:
+        yield group(batch)
+
+
+WRITERS = {
+    'csv': (write_csv, 'text/csv'),
+    'ndjson': (write_ndjson, 'application/x-ndjson'),
+    'columnar': (write_columnar, 'application/x-ndjson'),
+}
+
+
+def export(entity, format, **kwargs):
+    """
+    The export as a generator of text chunks.
+    """
+    writer, _ = WRITERS[format]
+    return writer(columns(ENTITIES[entity]), export_rows(entity, **kwargs))
+
+
+#----------------------------------------------------------------------------#
+# Command and endpoint.
+#----------------------------------------------------------------------------#
+
+
+@click.command('export')
+@click.argument('entity', type=click.Choice(list(ENTITIES)))
+@click.option('--format', 'format_', type=click.Choice(list(WRITERS)),
+              default='ndjson', show_default=True)
+@click.option('--since-id', type=int,
+              help='Only venues or artists with a greater id.')
+@click.option('--since', type=click.DateTime(['%Y-%m-%d']),
+              help='Only shows on or after this date.')
+@click.option('-o', '--output', type=click.File('w'), default='-')
+@with_appcontext
+def export_command(entity, format_, since_id, since, output):
+    """Stream venues, artists or shows to a CSV, NDJSON or columnar
+    file."""
+    for chunk in export(entity, format_, since_id=since_id,
+                        since=since and since.date()):
+        output.write(chunk)
+
+
+exports = Blueprint('exports', __name__)
+
+
+@exports.route('/<entity>.<format>')
+def export_entity(entity, format):
+    # Needs the EXPORT_TOKEN as a bearer token, disabled when there is none
+    token = current_app.config.get('EXPORT_TOKEN')
+    if not token:
+        abort(404)
+    if not hmac.compare_digest(
+            request.headers.get('Authorization', ''), f'Bearer {token}'):
+        abort(401)
+    if entity not in ENTITIES or format not in WRITERS:
+        abort(404)
+
+    since = request.args.get('since', type=date.fromisoformat)
+    chunks = export(
+        entity, format, since_id=request.args.get('since_id', type=int),
+        since=since
+    )
+    return Response(
+        stream_with_context(chunks), mimetype=WRITERS[format][1],
+        headers={
+            "Content-Disposition":
+                f'attachment; filename="{entity}.{format}"'
+        }
+    )
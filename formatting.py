@@ -0,0 +1,61 @@
+from datetime import datetime
+from functools import lru_cache
+
+import babel.dates
+from babel.core import Locale
+
+#----------------------------------------------------------------------------#
+# Date formatting.
+#----------------------------------------------------------------------------#
+
+# Named patterns of the `datetime` template filter
+FORMATS = {
+    'full': "EEEE MMMM, d, y 'at' h:mma",
+    'medium': "EE MM, dd, y h:mma"
+}
+
+# Named formats left to Babel, they depend on the locale
+BABEL_FORMATS = ('long', 'short')
+
+
+@lru_cache(maxsize=None)
+def compiled_pattern(pattern):
+    return babel.dates.parse_pattern(pattern)
+
+
+@lru_cache(maxsize=None)
+def get_locale(identifier):
+    return Locale.parse(identifier)
+
+
+def to_datetime(value):
+    """
+    Datetimes are used as is, ISO 8601 strings are parsed with the fast
+    `fromisoformat` and anything else goes through dateutil.
+    """
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        # Imported here, it is rarely needed and slow to import
+        import dateutil.parser
+        return dateutil.parser.parse(value)
+
+
+@lru_cache(maxsize=4096)
+def format_datetime(value, format='medium', locale='en'):
+    """
+    Format a datetime, or a string holding one, with one of the FORMATS
+    names or a Babel pattern. Patterns and locales are compiled once and
+    the formatted values are memoised.
+    """
+    value = to_datetime(value)
+    # Naive datetimes are taken as UTC, as Babel does
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=babel.dates.UTC)
+
+    pattern = FORMATS.get(format, format)
+    if pattern in BABEL_FORMATS:
+        return babel.dates.format_datetime(value, pattern, locale=locale)
+    return compiled_pattern(pattern).apply(value, get_locale(locale))
@@ -0,0 +1,138 @@
+import threading
+import time
+from collections import Counter
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from cache import cache, make_backend
+
+#----------------------------------------------------------------------------#
+# Fragment cache.
+#----------------------------------------------------------------------------#
+
+
+class FragmentCache:
+    """
+    Rendered template fragments, such as the venue and artist tiles and the
+    show cards, stored under a key naming the fragment and the entities it
+    shows:
+
+        {% cache ('venue-tile', venue.id, version('venue', venue.id)) %}
+            ...
+        {% endcache %}
+
+    `version(kind, id)` is the generation of the 'kind:id' namespace, which
+    the views already invalidate when an entity changes, so edited entities
+    get new keys and stale fragments are simply not read again. A time to
+    live in seconds may follow the key, FRAGMENT_CACHE_TIMEOUT by default.
+
+    FRAGMENT_CACHE_BACKEND is 'lru', bounded and per process, 'local', a
+    SQLite file shared by the processes of a host, 'redis', or None to
+    always render. Hits and misses are counted per fragment name.
+    """
+
+    def __init__(self, app=None):
+        self.backend = None
+        self.timeout = None
+        self.lock = threading.Lock()
+        self.hits = Counter()
+        self.misses = Counter()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.backend = make_backend(
+            app.config.get('FRAGMENT_CACHE_BACKEND'), app.config,
+            prefix='FRAGMENT_CACHE'
+        )
+        self.timeout = app.config.get('FRAGMENT_CACHE_TIMEOUT')
+        app.jinja_env.add_extension(FragmentCacheExtension)
+        app.jinja_env.fragment_cache = self
+        app.jinja_env.globals['version'] = self.version
+        cache.subscribe(self.invalidate)
+        app.extensions['fragment_cache'] = self
+
+    def version(self, kind, id):
+        if self.backend is None:
+            return 0
+        return self.backend.get_counters([f'generation:{kind}:{id}'])[0]
+
+    def invalidate(self, *namespaces):
+        if self.backend is None:
+            return
+        for namespace in namespaces:
+            self.backend.incr(f'generation:{namespace}')
+
+    def render(self, key, timeout, caller):
+        if self.backend is None:
+            return caller()
+
+        if isinstance(key, (tuple, list)):
+            name, key = key[0], ':'.join(map(str, key))
+        else:
+            name = key
+        key = f'fragment:{key}'
+        now = time.time()
+
+        entry = self.backend.get(key)
+        if entry is not None and (entry[0] is None or entry[0] > now):
+            with self.lock:
+                self.hits[name] += 1
+            return Markup(entry[1])
+
+        with self.lock:
+            self.misses[name] += 1
+        html = caller()
+        timeout = self.timeout if timeout is None else timeout
+        self.backend.set(
+            key, (timeout and now + timeout, str(html)), timeout=timeout
+        )
+        return html
+
+    def stats(self):
+        with self.lock:
+            return {
+                name: {
+                    "hits": self.hits[name],
+                    "misses": self.misses[name],
+                    "hit_ratio": round(
+                        self.hits[name] / (self.hits[name] +
+                                           self.misses[name]), 3
+                    )
+                } for name in self.hits.keys() | self.misses.keys()
+            }
+
+
+class FragmentCacheExtension(Extension):
+    """
+    The `{% cache key[, timeout] %}...{% endcache %}` tag, rendering
+    through the FragmentCache set on the environment.
+    """
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        if parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        else:
+            args.append(nodes.Const(None))
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method('_render', args), [], [], body
+        ).set_lineno(lineno)
+
+    def _render(self, key, timeout, caller):
+        fragment_cache = self.environment.fragment_cache
+        if fragment_cache is None:
+            return caller()
+        return fragment_cache.render(key, timeout, caller)
+
+
+fragments = FragmentCache()
@@ -0,0 +1,309 @@
+import csv
+import json
+import os
+from itertools import islice
+from time import perf_counter
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import literal_column
+from sqlalchemy.dialects import postgresql, sqlite
+from werkzeug.datastructures import MultiDict
+
+import counters
+import search
+from cache import cache
+from formatting import to_datetime
+from forms import VenueForm, ArtistForm, ShowForm, AvailabilityForm
+from models import db, Venue, Artist, Show, Availability
+from recent import recent
+from validation import validate_records
+
+#----------------------------------------------------------------------------#
+# Readers.
+#----------------------------------------------------------------------------#
+
+
+def read_csv(f):
+    """
+    List fields, like genres, hold their values separated by ';'.
+    """
+    for row in csv.DictReader(f):
+        yield {
+            key: value.split(';') if key == 'genres' else value
+            for key, value in row.items()
+        }
+
+
+def read_ndjson(f):
+    for line in f:
+        if line.strip():
+            yield json.loads(line)
+
+
+READERS = {
+    'csv': read_csv,
+    'ndjson': read_ndjson
+}
+
+
+#----------------------------------------------------------------------------#
+# Validation.
+#----------------------------------------------------------------------------#
+
+
+def form_data(row):
+    """
+    Row as the form data a browser would post.
+    """
+    data = MultiDict()
+    for key, value in row.items():
+        if value is None or value is False:
+            continue
+        if key == 'website':
+            key = 'website_link'
+        if key == 'start_time':
+            value = to_datetime(value).strftime('%Y-%m-%d %H:%M:%S')
+        if isinstance(value, list):
+            data.setlist(key, value)
+        else:
+            data[key] = value is True and 'y' or str(value)
+    return data
+
+
+def entity_row(model, form):
+    """
+    The columns the form fills, the id and the show counters left to their
+    defaults, counted as the shows are imported.
+    """
+    data = form.data
+    data['website'] = data.pop('website_link', None)
+    return {
+        column.name: data.get(column.name)
+        for column in model.__table__.columns
+        if column.name != 'id' and column.name not in counters.COUNTERS
+    }
+
+
+def show_row(model, form):
+    start_time = form.start_time.data
+    return {
+        "artist_id": int(form.artist_id.data),
+        "venue_id": int(form.venue_id.data),
+        "show_date": start_time.date(),
+        "show_time": start_time.time()
+    }
+
+
+def availability_row(model, form):
+    start_time = form.start_time.data
+    return {
+        "artist_id": int(form.artist_id),
+        "date": start_time.date(),
+        "time": start_time.time()
+    }
+
+
+class Entity:
+
+    def __init__(self, model, form, to_row, references=(), precheck=None):
+        self.model = model
+        self.form = form
+        self.to_row = to_row
+        # (column, model) pairs that must exist before inserting
+        self.references = references
+        # Batch validation rejecting rows before their forms are built
+        self.precheck = precheck
+
+
+ENTITIES = {
+    'venues': Entity(
+        Venue, VenueForm, entity_row, precheck=validate_records
+    ),
+    'artists': Entity(
+        Artist, ArtistForm, entity_row, precheck=validate_records
+    ),
+    'shows': Entity(
+        Show, ShowForm, show_row,
+        references=(('artist_id', Artist), ('venue_id', Venue))
+    ),
+    'availabilities': Entity(
+        Availability, AvailabilityForm, availability_row,
+        references=(('artist_id', Artist),)
+    ),
+}
+
+
+def validate(entity, row):
+    """
+    The row to insert and the errors of the same form as the web routes.
+    """
+    try:
+        formdata = form_data(row)
+    except (TypeError, ValueError):
+        return None, {"start_time": ['Not a valid datetime value.']}
+    form = entity.form(formdata=formdata, meta={'csrf': False})
+    if entity.model is Availability:
+        # Not part of the form, given by the URL on the web route
+        form.artist_id = row.get('artist_id')
+        if not str(form.artist_id or '').isdigit():
+            return None, {"artist_id": ['Not a valid artist id.']}
+    elif entity.model is Show:
+        for field in (form.artist_id, form.venue_id):
+            if not str(field.data or '').isdigit():
+                return None, {field.name: [f'Not a valid {field.name}.']}
+    if not form.validate():
+        return None, form.errors
+    return entity.to_row(entity.model, form), None
+
+
+#----------------------------------------------------------------------------#
+# Import.
+#----------------------------------------------------------------------------#
+
+
+def insert_ignoring_conflicts(model):
+    insert = {
+        'postgresql': postgresql.insert,
+        'sqlite': sqlite.insert
+    }[db.engine.dialect.name]
+    return insert(model.__table__).on_conflict_do_nothing()
+
+
+def execute_inserting(statement, rows):
+    """
+    Run an INSERT ... ON CONFLICT DO NOTHING for `rows`, returning how many
+    were inserted, duplicates not counted. psycopg2 only reports the
+    rowcount of the last page of an executemany, so on Postgres the
+    inserted rows are returned and counted instead.
+    """
+    if db.engine.dialect.name == 'postgresql':
+        statement = statement.returning(literal_column('1'))
+        return len(db.session.execute(statement, rows).all())
+    return db.session.execute(statement, rows).rowcount
+
+
+def missing_references(entity, rows):
+    """
+    Rows referring to ids that do not exist, checked with one query per
+    referenced model for the whole batch.
+    """
+    missing = set()
+    for column, model in entity.references:
+        ids = {row[column] for row in rows}
+        found = {id for (id,) in db.session.query(model.id).filter(
+            model.id.in_(ids))}
+        missing.update(
+            i for i, row in enumerate(rows) if row[column] not in found
+        )
+    return missing
+
+
+class Report:
+
+    def __init__(self, rejects):
+        self.read = 0
+        self.written = 0
+        self.duplicates = 0
+        self.rejected = 0
+        self.start = perf_counter()
+        self.rejects = rejects
+
+    def reject(self, record, row, errors):
+        self.rejected += 1
+        if self.rejects:
+            self.rejects.write(json.dumps(
+                {"record": record, "row": row, "errors": errors}, default=str
+            ) + '\n')
+
+    def summary(self):
+        elapsed = perf_counter() - self.start
+        return f'{self.read} rows read, {self.written} written, ' \
+               f'{self.duplicates} duplicates skipped, ' \
+               f'{self.rejected} rejected in ' \
+               f'{elapsed:.1f}s, {self.read / max(elapsed, 1e-9):.0f} rows/s'
+
+
+def import_rows(entity, rows, report, batch_size=1000):
+    """
+    Validate the rows and insert them in batches, each with one executemany
+    INSERT ... ON CONFLICT DO NOTHING and its own commit, so memory stays
+    constant however large the input is. Each batch is first checked column
+    wise by the entity's precheck, only the rows passing it go through the
+    forms.
+    """
+    statement = insert_ignoring_conflicts(entity.model)
+    batch, sources = list(), list()
+
+    def flush():
+        for i in sorted(missing_references(entity, batch), reverse=True):
+            record, row = sources.pop(i)
+            batch.pop(i)
+            report.reject(record, row, {"references": ['Does not exist.']})
+        if batch:
+            written = execute_inserting(statement, batch)
+            if entity.model is Show:
+                counters.shows_inserted(batch)
+            db.session.commit()
+            report.written += written
+            report.duplicates += len(batch) - written
+        batch.clear()
+        sources.clear()
+
+    records = enumerate(rows, start=1)
+    while True:
+        chunk = list(islice(records, batch_size))
+        if not chunk:
+            break
+        report.read += len(chunk)
+        prechecked = entity.precheck([row for _, row in chunk]) \
+            if entity.precheck else {}
+        for i, (record, row) in enumerate(chunk):
+            valid, errors = None, prechecked.get(i)
+            if errors is None:
+                valid, errors = validate(entity, row)
+            if errors:
+                report.reject(record, row, errors)
+                continue
+            batch.append(valid)
+            sources.append((record, row))
+        flush()
+
+
+@click.command('import')
+@click.argument('entity', type=click.Choice(list(ENTITIES)))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'format_', type=click.Choice(list(READERS)),
+              help='Input format, guessed from the file extension if '
+                   'not given.')
+@click.option('--batch-size', default=1000, show_default=True)
+@click.option('--rejects', type=click.File('w'),
+              help='Write the rejected rows and their errors as NDJSON.')
+@with_appcontext
+def import_command(entity, path, format_, batch_size, rejects):
+    """Bulk import venues, artists, shows or availabilities from a CSV or
+    NDJSON file, validated like the web forms."""
+    if format_ is None:
+        format_ = os.path.splitext(path)[1].lstrip('.').lower()
+        if format_ == 'jsonl':
+            format_ = 'ndjson'
+        if format_ not in READERS:
+            raise click.BadParameter('Unknown format, use --format.')
+
+    report = Report(rejects)
+    with open(path, newline='') as f:
+        import_rows(
+            ENTITIES[entity], READERS[format_](f), report, batch_size
+        )
+
+    # Bulk inserts bypass the ORM events and the routes' invalidation
+    model = ENTITIES[entity].model
+    if model in search.name_indexes:
+        search.name_indexes[model].invalidate()
+    cache.invalidate(entity, 'shows')
+    if model is Show:
+        cache.invalidate('venues', 'artists')
+    if model in (Venue, Artist):
+        recent.invalidate()
+
+    click.echo(report.summary())
@@ -0,0 +1,33 @@
+"""unique index on the venue and date of shows
+
+Revision ID: 2f7c8d3e9b15
+Revises: 9e2d5b7c1a46
+Create Date: 2026-10-18 16:02:27.504918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2f7c8d3e9b15'
+down_revision = '9e2d5b7c1a46'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Fails if a venue already has two shows a day, those must be moved first
+    op.drop_index('ix_shows_venue_id_show_date', table_name='shows')
+    op.create_index(
+        'ix_shows_venue_id_show_date', 'shows', ['venue_id', 'show_date'],
+        unique=True, postgresql_include=['show_time', 'artist_id']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_shows_venue_id_show_date', table_name='shows')
+    op.create_index(
+        'ix_shows_venue_id_show_date', 'shows', ['venue_id', 'show_date'],
+        unique=False, postgresql_include=['show_time', 'artist_id']
+    )
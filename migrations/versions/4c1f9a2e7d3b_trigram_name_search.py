@@ -0,0 +1,38 @@
+"""trigram indexes for venue and artist name search
+
+Revision ID: 4c1f9a2e7d3b
+Revises: bb3021284fbc
+Create Date: 2026-10-18 10:12:41.318402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4c1f9a2e7d3b'
+down_revision = 'bb3021284fbc'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # pg_trgm lets GIN indexes serve ILIKE '%term%' and similarity ranking
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(
+        'ix_venues_name_trgm', 'venues', ['name'], unique=False,
+        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}
+    )
+    op.create_index(
+        'ix_artists_name_trgm', 'artists', ['name'], unique=False,
+        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_artists_name_trgm', table_name='artists')
+    op.drop_index('ix_venues_name_trgm', table_name='venues')
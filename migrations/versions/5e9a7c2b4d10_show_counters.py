@@ -0,0 +1,61 @@
+"""upcoming and past show counters on venues and artists
+
+Revision ID: 5e9a7c2b4d10
+Revises: d81b3f5a0c27
+Create Date: 2026-10-18 19:12:40.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e9a7c2b4d10'
+down_revision = 'd81b3f5a0c27'
+branch_labels = None
+depends_on = None
+
+TABLES = (('venues', 'venue_id'), ('artists', 'artist_id'))
+
+
+def upgrade():
+    for table, key in TABLES:
+        op.add_column(table, sa.Column(
+            'upcoming_shows_count', sa.Integer(), nullable=False,
+            server_default='0'
+        ))
+        op.add_column(table, sa.Column(
+            'past_shows_count', sa.Integer(), nullable=False,
+            server_default='0'
+        ))
+        op.add_column(table, sa.Column(
+            'next_show_date', sa.Date(), nullable=True
+        ))
+        # Backfill, later kept up to date by the application
+        op.execute(f"""
+            UPDATE {table} SET
+                upcoming_shows_count = (
+                    SELECT count(*) FROM shows
+                    WHERE shows.{key} = {table}.id
+                    AND shows.show_date >= CURRENT_DATE),
+                past_shows_count = (
+                    SELECT count(*) FROM shows
+                    WHERE shows.{key} = {table}.id
+                    AND shows.show_date < CURRENT_DATE),
+                next_show_date = (
+                    SELECT min(shows.show_date) FROM shows
+                    WHERE shows.{key} = {table}.id
+                    AND shows.show_date >= CURRENT_DATE)
+        """)
+        op.create_index(
+            f'ix_{table}_next_show_date', table, ['next_show_date'],
+            unique=False
+        )
+
+
+def downgrade():
+    for table, _ in reversed(TABLES):
+        op.drop_index(f'ix_{table}_next_show_date', table_name=table)
+        op.drop_column(table, 'next_show_date')
+        op.drop_column(table, 'past_shows_count')
+        op.drop_column(table, 'upcoming_shows_count')
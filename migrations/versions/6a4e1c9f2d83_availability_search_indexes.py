@@ -0,0 +1,33 @@
+"""indexes for the availability search
+
+Revision ID: 6a4e1c9f2d83
+Revises: 2f7c8d3e9b15
+Create Date: 2026-10-18 17:21:48.116530
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6a4e1c9f2d83'
+down_revision = '2f7c8d3e9b15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_artists_genres', 'artists', ['genres'], unique=False,
+        postgresql_using='gin'
+    )
+    op.create_index(
+        'ix_availabilities_date_artist_id', 'availabilities',
+        ['date', 'artist_id'], unique=False, postgresql_include=['time']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_availabilities_date_artist_id',
+                  table_name='availabilities')
+    op.drop_index('ix_artists_genres', table_name='artists')
@@ -0,0 +1,43 @@
+"""composite indexes on shows and availabilities
+
+Revision ID: 9e2d5b7c1a46
+Revises: 4c1f9a2e7d3b
+Create Date: 2026-10-18 13:40:05.771204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e2d5b7c1a46'
+down_revision = '4c1f9a2e7d3b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_shows_venue_id_show_date', 'shows', ['venue_id', 'show_date'],
+        unique=False, postgresql_include=['show_time', 'artist_id']
+    )
+    op.create_index(
+        'ix_shows_artist_id_show_date', 'shows', ['artist_id', 'show_date'],
+        unique=False, postgresql_include=['show_time', 'venue_id']
+    )
+    op.create_index(
+        'ix_shows_show_date_show_time', 'shows',
+        ['show_date', 'show_time', 'venue_id', 'artist_id'], unique=False
+    )
+    op.create_index(
+        'ix_availabilities_artist_id_date', 'availabilities',
+        ['artist_id', 'date'], unique=False, postgresql_include=['time']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_availabilities_artist_id_date',
+                  table_name='availabilities')
+    op.drop_index('ix_shows_show_date_show_time', table_name='shows')
+    op.drop_index('ix_shows_artist_id_show_date', table_name='shows')
+    op.drop_index('ix_shows_venue_id_show_date', table_name='shows')
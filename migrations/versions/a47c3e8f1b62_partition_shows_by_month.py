@@ -0,0 +1,123 @@
+"""partition shows by month, with an archive for old months
+
+Revision ID: a47c3e8f1b62
+Revises: 5e9a7c2b4d10
+Create Date: 2026-10-18 20:03:15.284716
+
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a47c3e8f1b62'
+down_revision = '5e9a7c2b4d10'
+branch_labels = None
+depends_on = None
+
+COLUMNS = 'artist_id, venue_id, show_date, show_time'
+
+# Months of partitions created ahead, later by `flask partitions maintain`
+AHEAD = 3
+
+
+def add_months(day, months):
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def create_shows_table(name, **kwargs):
+    op.create_table(name,
+    sa.Column('artist_id', sa.Integer(), nullable=False),
+    sa.Column('venue_id', sa.Integer(), nullable=False),
+    sa.Column('show_date', sa.Date(), nullable=False),
+    sa.Column('show_time', sa.Time(), nullable=False),
+    sa.ForeignKeyConstraint(['artist_id'], ['artists.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['venue_id'], ['venues.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('artist_id', 'venue_id', 'show_date'),
+    **kwargs
+    )
+
+
+def create_shows_indexes():
+    op.create_index(
+        'ix_shows_venue_id_show_date', 'shows', ['venue_id', 'show_date'],
+        unique=True, postgresql_include=['show_time', 'artist_id']
+    )
+    op.create_index(
+        'ix_shows_artist_id_show_date', 'shows', ['artist_id', 'show_date'],
+        unique=False, postgresql_include=['show_time', 'venue_id']
+    )
+    op.create_index(
+        'ix_shows_show_date_show_time', 'shows',
+        ['show_date', 'show_time', 'venue_id', 'artist_id'], unique=False
+    )
+
+
+def drop_shows_indexes():
+    op.drop_index('ix_shows_show_date_show_time', table_name='shows')
+    op.drop_index('ix_shows_artist_id_show_date', table_name='shows')
+    op.drop_index('ix_shows_venue_id_show_date', table_name='shows')
+
+
+def upgrade():
+    # Indexes are rebuilt on the partitioned table, dropping them first
+    # also frees their names and speeds up the copy
+    drop_shows_indexes()
+    op.execute('ALTER TABLE shows DROP CONSTRAINT shows_pkey')
+    op.rename_table('shows', 'shows_unpartitioned')
+
+    create_shows_table('shows', postgresql_partition_by='RANGE (show_date)')
+    create_shows_indexes()
+    op.execute('CREATE TABLE shows_default PARTITION OF shows DEFAULT')
+
+    first = op.get_bind().execute(
+        sa.text('SELECT min(show_date) FROM shows_unpartitioned')
+    ).scalar()
+    current = date.today().replace(day=1)
+    start = min(first.replace(day=1), current) if first else current
+    while start <= add_months(current, AHEAD):
+        end = add_months(start, 1)
+        op.execute(
+            f'CREATE TABLE shows_{start:%Y_%m} PARTITION OF shows '
+            f"FOR VALUES FROM ('{start}') TO ('{end}')"
+        )
+        start = end
+
+    op.execute(
+        f'INSERT INTO shows ({COLUMNS}) '
+        f'SELECT {COLUMNS} FROM shows_unpartitioned'
+    )
+    op.drop_table('shows_unpartitioned')
+
+    create_shows_table(
+        'shows_archive', postgresql_partition_by='RANGE (show_date)'
+    )
+    op.create_index(
+        'ix_shows_archive_venue_id_show_date', 'shows_archive',
+        ['venue_id', 'show_date'], unique=False
+    )
+    op.create_index(
+        'ix_shows_archive_artist_id_show_date', 'shows_archive',
+        ['artist_id', 'show_date'], unique=False
+    )
+
+
+def downgrade():
+    create_shows_table('shows_unpartitioned')
+    op.execute(
+        f'INSERT INTO shows_unpartitioned ({COLUMNS}) '
+        f'SELECT {COLUMNS} FROM shows UNION ALL '
+        f'SELECT {COLUMNS} FROM shows_archive'
+    )
+    # Dropping the partitioned tables drops their partitions
+    op.drop_table('shows_archive')
+    op.drop_table('shows')
+    op.execute(
+        'ALTER TABLE shows_unpartitioned '
+        'RENAME CONSTRAINT shows_unpartitioned_pkey TO shows_pkey'
+    )
+    op.rename_table('shows_unpartitioned', 'shows')
+    create_shows_indexes()
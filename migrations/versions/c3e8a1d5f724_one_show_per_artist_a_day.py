@@ -0,0 +1,35 @@
+"""unique index on the artist and date of shows
+
+Revision ID: c3e8a1d5f724
+Revises: a47c3e8f1b62
+Create Date: 2026-10-18 22:41:09.371205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e8a1d5f724'
+down_revision = 'a47c3e8f1b62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Fails if an artist already has two shows a day, those must be moved
+    # first. Created on the partitioned table, it is built on every
+    # partition and includes their key, show_date
+    op.drop_index('ix_shows_artist_id_show_date', table_name='shows')
+    op.create_index(
+        'ix_shows_artist_id_show_date', 'shows', ['artist_id', 'show_date'],
+        unique=True, postgresql_include=['show_time', 'venue_id']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_shows_artist_id_show_date', table_name='shows')
+    op.create_index(
+        'ix_shows_artist_id_show_date', 'shows', ['artist_id', 'show_date'],
+        unique=False, postgresql_include=['show_time', 'venue_id']
+    )
@@ -0,0 +1,46 @@
+"""recurring availability rules
+
+Revision ID: d81b3f5a0c27
+Revises: 6a4e1c9f2d83
+Create Date: 2026-10-18 18:34:09.692051
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd81b3f5a0c27'
+down_revision = '6a4e1c9f2d83'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('availability_rules',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('artist_id', sa.Integer(), nullable=False),
+    sa.Column('weekdays', sa.SmallInteger(), nullable=False),
+    sa.Column('time', sa.Time(), nullable=False),
+    sa.Column('start_date', sa.Date(), nullable=False),
+    sa.Column('end_date', sa.Date(), nullable=False),
+    sa.Column('materialized_until', sa.Date(), nullable=False),
+    sa.ForeignKeyConstraint(['artist_id'], ['artists.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_availability_rules_materialized_until', 'availability_rules',
+        ['materialized_until'], unique=False
+    )
+    op.create_index(
+        'ix_availability_rules_artist_id', 'availability_rules',
+        ['artist_id'], unique=False
+    )
+
+
+def downgrade():
+    op.drop_index('ix_availability_rules_artist_id',
+                  table_name='availability_rules')
+    op.drop_index('ix_availability_rules_materialized_until',
+                  table_name='availability_rules')
+    op.drop_table('availability_rules')
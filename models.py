@@ -1,17 +1,21 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import DDL, event
 
 #----------------------------------------------------------------------------#
 # Models.
 #----------------------------------------------------------------------------#
 db = SQLAlchemy()
 
+# Postgres arrays, stored as JSON lists on SQLite for offline test runs
+GENRES_TYPE = db.ARRAY(db.String).with_variant(db.JSON, 'sqlite')
+
 
 class Venue(db.Model):
     __tablename__ = 'venues'
 
     id = db.Column(db.Integer, primary_key=True, nullable=False)
     name = db.Column(db.String(), nullable=False)
-    genres = db.Column(db.ARRAY(db.String), nullable=False)
+    genres = db.Column(GENRES_TYPE, nullable=False)
 
     city = db.Column(db.String(120), nullable=False)
     state = db.Column(db.String(120), nullable=False)
@@ -25,11 +29,28 @@ class Venue(db.Model):
     image_link = db.Column(db.String(500))
     facebook_link = db.Column(db.String(120))
 
+    # Maintained by counters.py, upcoming meaning on or after today
+    upcoming_shows_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default='0'
+    )
+    past_shows_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default='0'
+    )
+    next_show_date = db.Column(db.Date)
+
     shows = db.relationship(
         'Show', backref='venue', cascade='all, delete-orphan'
         )
 
-    __table_args__ = (db.UniqueConstraint('name', 'city', 'state', 'address'),)
+    __table_args__ = (
+        db.UniqueConstraint('name', 'city', 'state', 'address'),
+        db.Index(
+            'ix_venues_name_trgm', 'name', postgresql_using='gin',
+            postgresql_ops={'name': 'gin_trgm_ops'}
+        ),
+        # Finds the venues whose next show has passed on rollover
+        db.Index('ix_venues_next_show_date', 'next_show_date'),
+    )
 
 
 class Artist(db.Model):
@@ -37,7 +58,7 @@ class Artist(db.Model):
 
     id = db.Column(db.Integer, primary_key=True, nullable=False)
     name = db.Column(db.String(), nullable=False)
-    genres = db.Column(db.ARRAY(db.String), nullable=False)
+    genres = db.Column(GENRES_TYPE, nullable=False)
 
     city = db.Column(db.String(120), nullable=False)
     state = db.Column(db.String(120), nullable=False)
@@ -50,14 +71,35 @@ class Artist(db.Model):
     image_link = db.Column(db.String(500))
     facebook_link = db.Column(db.String(120))
 
+    # Maintained by counters.py, upcoming meaning on or after today
+    upcoming_shows_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default='0'
+    )
+    past_shows_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default='0'
+    )
+    next_show_date = db.Column(db.Date)
+
     shows = db.relationship(
         'Show', backref='artist', cascade='all, delete-orphan'
         )
     availabilities = db.relationship(
         'Availability', backref='artist', cascade='all, delete-orphan'
     )
+    availability_rules = db.relationship(
+        'AvailabilityRule', backref='artist', cascade='all, delete-orphan'
+    )
 
-    __table_args__ = (db.UniqueConstraint('name', 'phone'),)
+    __table_args__ = (
+        db.UniqueConstraint('name', 'phone'),
+        db.Index(
+            'ix_artists_name_trgm', 'name', postgresql_using='gin',
+            postgresql_ops={'name': 'gin_trgm_ops'}
+        ),
+        # Serves genre containment in the availability search
+        db.Index('ix_artists_genres', 'genres', postgresql_using='gin'),
+        db.Index('ix_artists_next_show_date', 'next_show_date'),
+    )
 
 
 class Show(db.Model):
@@ -76,6 +118,66 @@ class Show(db.Model):
     show_date = db.Column(db.Date, primary_key=True, nullable=False)
     show_time = db.Column(db.Time, nullable=False)
 
+    # The primary key only serves artist first lookups by equality, these
+    # serve the per venue/artist date range filters and the shows feed order.
+    # A venue and an artist have at most one show a day, enforced by their
+    # unique indexes.
+    # On Postgres the table is partitioned by month of show_date, see
+    # partitions.py, so queries on upcoming shows only visit recent months.
+    __table_args__ = (
+        db.Index(
+            'ix_shows_venue_id_show_date', 'venue_id', 'show_date',
+            unique=True, postgresql_include=['show_time', 'artist_id']
+        ),
+        db.Index(
+            'ix_shows_artist_id_show_date', 'artist_id', 'show_date',
+            unique=True, postgresql_include=['show_time', 'venue_id']
+        ),
+        db.Index(
+            'ix_shows_show_date_show_time',
+            'show_date', 'show_time', 'venue_id', 'artist_id'
+        ),
+        {'postgresql_partition_by': 'RANGE (show_date)'}
+    )
+
+
+# Rows of the months without a partition yet, moved out by partitions.py
+event.listen(Show.__table__, 'after_create', DDL(
+    'CREATE TABLE shows_default PARTITION OF shows DEFAULT'
+).execute_if(dialect='postgresql'))
+
+
+class ArchivedShow(db.Model):
+    """
+    Shows of the months archived by partitions.py, whose partitions are
+    detached from `shows` and attached here. Only read by the past shows
+    sections of the venue and artist pages and by the shows export.
+    """
+    __tablename__ = 'shows_archive'
+
+    artist_id = db.Column(
+        db.Integer,
+        db.ForeignKey(
+            'artists.id', ondelete='CASCADE'), primary_key=True, nullable=False
+    )
+    venue_id = db.Column(
+        db.Integer,
+        db.ForeignKey(
+            'venues.id', ondelete='CASCADE'), primary_key=True, nullable=False
+    )
+    show_date = db.Column(db.Date, primary_key=True, nullable=False)
+    show_time = db.Column(db.Time, nullable=False)
+
+    __table_args__ = (
+        db.Index(
+            'ix_shows_archive_venue_id_show_date', 'venue_id', 'show_date'
+        ),
+        db.Index(
+            'ix_shows_archive_artist_id_show_date', 'artist_id', 'show_date'
+        ),
+        {'postgresql_partition_by': 'RANGE (show_date)'}
+    )
+
 
 class Availability(db.Model):
     __tablename__ = "availabilities"
@@ -87,3 +189,41 @@ class Availability(db.Model):
     )
     date = db.Column(db.Date, primary_key=True, nullable=False)
     time = db.Column(db.Time, nullable=False)
+
+    # Covers the time range checks so they are answered from the index,
+    # the second serves date range searches across artists
+    __table_args__ = (
+        db.Index(
+            'ix_availabilities_artist_id_date', 'artist_id', 'date',
+            postgresql_include=['time']
+        ),
+        db.Index(
+            'ix_availabilities_date_artist_id', 'date', 'artist_id',
+            postgresql_include=['time']
+        ),
+    )
+
+
+class AvailabilityRule(db.Model):
+    __tablename__ = 'availability_rules'
+
+    id = db.Column(db.Integer, primary_key=True, nullable=False)
+    artist_id = db.Column(
+        db.Integer,
+        db.ForeignKey('artists.id', ondelete='CASCADE'), nullable=False
+    )
+    # Bit 0 is Monday, bit 6 Sunday
+    weekdays = db.Column(db.SmallInteger, nullable=False)
+    time = db.Column(db.Time, nullable=False)
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=False)
+    # Availabilities are inserted up to this date, later ones daily or once
+    # booked
+    materialized_until = db.Column(db.Date, nullable=False)
+
+    __table_args__ = (
+        db.Index(
+            'ix_availability_rules_materialized_until', 'materialized_until'
+        ),
+        db.Index('ix_availability_rules_artist_id', 'artist_id'),
+    )
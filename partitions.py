@@ -0,0 +1,206 @@
+import re
+from datetime import date
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import text
+
+from models import db
+
+#----------------------------------------------------------------------------#
+# Monthly partitions.
+#----------------------------------------------------------------------------#
+
+# On Postgres `shows` is range partitioned by show_date, one partition a
+# month named shows_YYYY_MM, plus a default partition catching the months
+# not created yet. Partitions older than a cutoff are moved to the
+# partitioned `shows_archive` table, keeping `shows` and its indexes to
+# the months that upcoming shows and bookings look at.
+PARENT = 'shows'
+DEFAULT = 'shows_default'
+ARCHIVE = 'shows_archive'
+
+BOUNDS = re.compile(r"FROM \('([0-9-]+)'\) TO \('([0-9-]+)'\)")
+
+
+def month(day):
+    return day.replace(day=1)
+
+
+def add_months(day, months):
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(start):
+    return f'{PARENT}_{start:%Y_%m}'
+
+
+def is_partitioned():
+    if db.engine.dialect.name != 'postgresql':
+        return False
+    return bool(db.session.execute(text(
+        "SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(:name)"
+    ), {"name": PARENT}).scalar())
+
+
+def partitions(parent=PARENT):
+    """
+    [(name, start, end)] of the monthly partitions of `parent`, oldest
+    first, the default partition excluded.
+    """
+    rows = db.session.execute(text(
+        'SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) '
+        'FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+        'WHERE i.inhparent = to_regclass(:parent)'
+    ), {"parent": parent})
+    found = list()
+    for name, bound in rows:
+        match = BOUNDS.search(bound)
+        if match:
+            start, end = map(date.fromisoformat, match.groups())
+            found.append((name, start, end))
+    return sorted(found, key=lambda partition: partition[1])
+
+
+def move_from_default(name, start):
+    """
+    Move the rows the default partition holds for the month beginning at
+    `start` into the partition `name`.
+    """
+    db.session.execute(text(
+        f'WITH moved AS (DELETE FROM {DEFAULT} '
+        f'WHERE show_date >= :start AND show_date < :end RETURNING *) '
+        f'INSERT INTO {name} SELECT * FROM moved'
+    ), {"start": start, "end": add_months(start, 1)})
+
+
+def create_partition(start):
+    """
+    Create the partition of the month beginning at `start`. Rows the
+    default partition holds for that month are moved into it first, as
+    they would otherwise forbid attaching it.
+    """
+    name, end = partition_name(start), add_months(start, 1)
+    db.session.execute(text(
+        f'CREATE TABLE {name} '
+        f'(LIKE {PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+    ))
+    move_from_default(name, start)
+    db.session.execute(text(
+        f'ALTER TABLE {PARENT} ATTACH PARTITION {name} '
+        f"FOR VALUES FROM ('{start}') TO ('{end}')"
+    ))
+    return name
+
+
+def create_ahead(months, on=None):
+    """
+    Create the missing partitions up to `months` months after the one of
+    `on`, today by default, and those of any month the default partition
+    holds rows for. Months already archived keep their partition in
+    `shows_archive`, rows later added for them are moved there instead.
+    Returns the names of the partitions created.
+    """
+    current = month(on or date.today())
+    first, last = db.session.execute(text(
+        f'SELECT min(show_date), max(show_date) FROM {DEFAULT}'
+    )).one()
+    start = month(min(first or current, current))
+    end = max(month(last or current), add_months(current, months))
+
+    existing = {start for _, start, _ in partitions()}
+    archived = {start: name for name, start, _ in partitions(ARCHIVE)}
+    created = list()
+    while start <= end:
+        if start in archived:
+            move_from_default(archived[start], start)
+        elif start not in existing:
+            created.append(create_partition(start))
+        start = add_months(start, 1)
+    return created
+
+
+def archivable(keep, on=None):
+    """
+    Partitions of the months ending `keep` months or more before the one
+    of `on`, today by default.
+    """
+    cutoff = add_months(month(on or date.today()), -keep)
+    return [partition for partition in partitions() if partition[2] <= cutoff]
+
+
+def archive(name, start, end, tablespace=None):
+    """
+    Move a partition from `shows` to `shows_archive`, optionally rewriting
+    it compactly into a cheaper `tablespace`. Detaching locks `shows`
+    until the transaction ends.
+    """
+    db.session.execute(text(f'ALTER TABLE {PARENT} DETACH PARTITION {name}'))
+    if tablespace is not None:
+        db.session.execute(text(
+            f'ALTER TABLE {name} SET TABLESPACE {tablespace}'
+        ))
+    db.session.execute(text(
+        f'ALTER TABLE {ARCHIVE} ATTACH PARTITION {name} '
+        f"FOR VALUES FROM ('{start}') TO ('{end}')"
+    ))
+
+
+#----------------------------------------------------------------------------#
+# Commands.
+#----------------------------------------------------------------------------#
+
+partitions_command = AppGroup(
+    'partitions', help='Maintain the monthly partitions of shows.'
+)
+
+
+def require_partitioned():
+    if not is_partitioned():
+        raise click.ClickException(
+            'shows is not partitioned, which requires Postgres and the '
+            'partitioning migration.'
+        )
+
+
+@partitions_command.command('maintain')
+@click.option('--ahead', type=int,
+              help='Months to create partitions for ahead of the current '
+                   'one, SHOWS_PARTITIONS_AHEAD by default.')
+@click.option('--keep', type=int,
+              help='Months of past shows kept in shows before archiving, '
+                   'SHOWS_ARCHIVE_AFTER_MONTHS by default.')
+@click.option('--tablespace', help='Move archived partitions there.')
+def maintain_command(ahead, keep, tablespace):
+    """Create the coming months' partitions and archive the old ones, run
+    daily or at least monthly."""
+    require_partitioned()
+    config = current_app.config
+    created = create_ahead(
+        config['SHOWS_PARTITIONS_AHEAD'] if ahead is None else ahead
+    )
+    db.session.commit()
+    archived = archivable(
+        config['SHOWS_ARCHIVE_AFTER_MONTHS'] if keep is None else keep
+    )
+    for partition in archived:
+        # One transaction each, so shows is locked briefly at a time
+        archive(*partition, tablespace=tablespace)
+        db.session.commit()
+    archived = [name for name, _, _ in archived]
+    click.echo(f'Created: {", ".join(created) or "none"}')
+    click.echo(f'Archived: {", ".join(archived) or "none"}')
+
+
+@partitions_command.command('list')
+def list_command():
+    """List the partitions of shows and of the archive."""
+    require_partitioned()
+    for parent in (PARENT, ARCHIVE):
+        for name, start, end in partitions(parent):
+            rows = db.session.execute(
+                text(f'SELECT count(*) FROM {name}')
+            ).scalar()
+            click.echo(f'{parent:<14}{name:<18}{start} to {end}{rows:>10}')
@@ -0,0 +1,223 @@
+import json
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from time import perf_counter
+
+from flask import current_app, g, has_app_context, has_request_context, \
+    request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger('fyyur.profiler')
+
+# The cursor events are listened to once per process, on every engine, and
+# passed to the profiler of the current app, however many apps are created
+listening = False
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+#----------------------------------------------------------------------------#
+# Profiler.
+#----------------------------------------------------------------------------#
+
+
+class RequestProfile:
+
+    def __init__(self):
+        self.start = perf_counter()
+        self.statements = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.queries = list()
+        self.status = None
+
+    def record_query(self, statement, elapsed):
+        self.statements += 1
+        self.db_time += elapsed
+        self.queries.append((elapsed, statement))
+
+    def as_dict(self, slowest=5):
+        self.queries.sort(key=lambda query: query[0], reverse=True)
+        return {
+            "method": request.method,
+            "path": request.full_path.rstrip('?'),
+            "endpoint": request.endpoint,
+            "status": self.status,
+            "statements": self.statements,
+            "db_ms": round(self.db_time * 1000, 3),
+            "template_ms": round(self.template_time * 1000, 3),
+            "total_ms": round((perf_counter() - self.start) * 1000, 3),
+            "slowest": [{
+                "ms": round(elapsed * 1000, 3),
+                "statement": statement
+            } for (elapsed, statement) in self.queries[:slowest]]
+        }
+
+
+class Profiler:
+    """
+    Per request SQL and template profiler.
+
+    Statements are timed through SQLAlchemy cursor events on every engine
+    and template rendering through the Jinja environment, then summarised
+    and checked against the query budget when the request is torn down,
+    once streamed responses are done. The summary is logged as JSON to the
+    'fyyur.profiler' logger and the most recent ones are kept for the
+    /_debug/profile endpoint.
+    """
+
+    def __init__(self, app=None):
+        self.history = deque(maxlen=100)
+        self.slowest = 5
+        self.slow_query_ms = None
+        self.query_budget = None
+        self.enforce_budget = False
+        self.local = threading.local()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if not app.config.get('PROFILER_ENABLED'):
+            return
+
+        self.history = deque(maxlen=app.config.get('PROFILER_HISTORY', 100))
+        self.slowest = app.config.get('PROFILER_SLOWEST', 5)
+        self.slow_query_ms = app.config.get('PROFILER_SLOW_QUERY_MS')
+        self.query_budget = app.config.get('PROFILER_QUERY_BUDGET')
+        self.enforce_budget = app.config.get('PROFILER_ENFORCE_BUDGET', False)
+
+        listen()
+        app.jinja_env.template_class = timed_template(
+            app.jinja_env.template_class, self
+        )
+        app.before_request(self.start_request)
+        app.after_request(self.record_status)
+        app.teardown_request(self.finish_request)
+        app.extensions['profiler'] = self
+
+    @property
+    def current(self):
+        if has_request_context():
+            return g.get('_profile')
+        return None
+
+    def record_query(self, statement, elapsed):
+        counter = getattr(self.local, 'counter', None)
+        if counter is not None:
+            counter.append(statement)
+        profile = self.current
+        if profile is not None:
+            profile.record_query(statement, elapsed)
+        if self.slow_query_ms and elapsed * 1000 >= self.slow_query_ms:
+            logger.warning(json.dumps({
+                "slow_query_ms": round(elapsed * 1000, 3),
+                "statement": statement
+            }))
+
+    def start_request(self):
+        g._profile = RequestProfile()
+
+    def record_status(self, response):
+        profile = self.current
+        if profile is not None:
+            profile.status = response.status_code
+        return response
+
+    def finish_request(self, exc):
+        profile = self.current
+        if profile is None:
+            return
+        summary = profile.as_dict(self.slowest)
+        self.history.append(summary)
+        logger.info(json.dumps(summary))
+        # Streamed bodies have been sent by now, an exceeded budget is
+        # raised when the response is closed
+        budget = self.query_budget
+        if budget is not None and profile.statements > budget:
+            message = f'{request.endpoint} ran {profile.statements} ' \
+                      f'statements, budget is {budget}'
+            if self.enforce_budget:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+    @contextmanager
+    def budget(self, max_statements):
+        """
+        Fail with QueryBudgetExceeded when the block runs more than
+        `max_statements` statements, e.g. around a test client request.
+        """
+        statements = self.local.counter = list()
+        try:
+            yield statements
+        finally:
+            self.local.counter = None
+        if len(statements) > max_statements:
+            raise QueryBudgetExceeded(
+                f'{len(statements)} statements, budget is {max_statements}'
+            )
+
+
+def listen():
+    global listening
+    if listening:
+        return
+    event.listen(Engine, 'before_cursor_execute', before_execute)
+    event.listen(Engine, 'after_cursor_execute', after_execute)
+    listening = True
+
+
+def before_execute(conn, cursor, statement, parameters, context,
+                   executemany):
+    context._profiler_start = perf_counter()
+
+
+def after_execute(conn, cursor, statement, parameters, context, executemany):
+    if not has_app_context():
+        return
+    profiler = current_app.extensions.get('profiler')
+    if profiler is not None:
+        profiler.record_query(
+            statement, perf_counter() - context._profiler_start
+        )
+
+
+def timed_template(template_class, profiler):
+    """
+    Template class adding the time spent rendering, less the time spent in
+    statements run while rendering, to the current request profile.
+    """
+
+    @contextmanager
+    def timed():
+        profile = profiler.current
+        if profile is None:
+            yield
+            return
+        start, db_time = perf_counter(), profile.db_time
+        try:
+            yield
+        finally:
+            profile.template_time += \
+                perf_counter() - start - (profile.db_time - db_time)
+
+    class TimedTemplate(template_class):
+
+        def render(self, *args, **kwargs):
+            with timed():
+                return super().render(*args, **kwargs)
+
+        def generate(self, *args, **kwargs):
+            chunks = super().generate(*args, **kwargs)
+            while True:
+                with timed():
+                    chunk = next(chunks, None)
+                if chunk is None:
+                    return
+                yield chunk
+
+    return TimedTemplate
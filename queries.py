@@ -0,0 +1,295 @@
+from datetime import date, datetime, time
+from itertools import groupby
+
+from sqlalchemy import case, select, tuple_, union_all
+
+from models import db, Venue, Artist, Show, ArchivedShow, Availability
+
+#----------------------------------------------------------------------------#
+# Helpers.
+#----------------------------------------------------------------------------#
+
+
+# Foreign key on shows pointing to each model
+SHOW_KEYS = {
+    Venue: Show.venue_id,
+    Artist: Show.artist_id
+}
+
+
+def today():
+    return datetime.now().date()
+
+
+#----------------------------------------------------------------------------#
+# Venues.
+#----------------------------------------------------------------------------#
+
+
+def venue_areas():
+    """
+    Venues grouped by area, each with its number of upcoming shows read
+    from its counter, in a single query:
+    [{"city": ..., "state": ..., "venues": [
+        {"id": ..., "name": ..., "num_upcoming_shows": ...}, ...]}, ...]
+    """
+    rows = db.session.query(
+        Venue.city, Venue.state, Venue.id, Venue.name,
+        Venue.upcoming_shows_count
+    ).order_by(
+        Venue.city, Venue.state, Venue.id
+    ).all()
+
+    areas = list()
+    for (city, state), venues in groupby(rows, key=lambda row: row[:2]):
+        areas.append({
+            "city": city,
+            "state": state,
+            "venues": [{
+                "id": venue_id,
+                "name": name,
+                "num_upcoming_shows": num_upcoming_shows
+            } for (_, _, venue_id, name, num_upcoming_shows) in venues]
+        })
+
+    return areas
+
+
+#----------------------------------------------------------------------------#
+# Listings.
+#----------------------------------------------------------------------------#
+
+
+def entity_page(model, after=None, per_page=50):
+    """
+    Page of venues or artists ordered by id, each with its number of
+    upcoming shows, starting after the id `after`. Returns the
+    [(entity, num_upcoming_shows), ...] rows and the cursor of the next
+    page, None on the last page.
+    """
+    query = db.session.query(model, model.upcoming_shows_count)
+    if after is not None:
+        query = query.filter(model.id > after)
+
+    # One extra row tells whether there is a next page
+    rows = query.order_by(
+        model.id
+    ).limit(per_page + 1).all()
+
+    next_cursor = rows[per_page - 1][0].id if len(rows) > per_page else None
+    return rows[:per_page], next_cursor
+
+
+#----------------------------------------------------------------------------#
+# Shows.
+#----------------------------------------------------------------------------#
+
+# Keyset the shows feed is ordered and paginated on
+SHOWS_FEED_KEY = (Show.show_date, Show.show_time, Show.venue_id, Show.artist_id)
+
+
+def encode_show_cursor(show_date, show_time, venue_id, artist_id):
+    return f'{show_date.isoformat()}_{show_time.isoformat()}_' \
+           f'{venue_id}_{artist_id}'
+
+
+def decode_show_cursor(cursor):
+    """
+    Inverse of encode_show_cursor, raises ValueError on malformed cursors.
+    """
+    show_date, show_time, venue_id, artist_id = cursor.split('_')
+    return (
+        date.fromisoformat(show_date), time.fromisoformat(show_time),
+        int(venue_id), int(artist_id)
+    )
+
+
+class UpcomingShows:
+    """
+    One page of the upcoming shows feed, read with a single joined and
+    column projected query. Rows are produced lazily while iterating, so a
+    page can be streamed straight into a template. Once iterated,
+    `next_cursor` holds the cursor of the next page or None on the last
+    page.
+    """
+
+    def __init__(self, after=None, per_page=30):
+        self.after = after
+        self.per_page = per_page
+        self.next_cursor = None
+
+    def query(self):
+        query = db.session.query(
+            *SHOWS_FEED_KEY, Venue.name, Artist.name, Artist.image_link
+        ).join(
+            Venue, Venue.id == Show.venue_id
+        ).join(
+            Artist, Artist.id == Show.artist_id
+        ).filter(
+            Show.show_date >= today()
+        )
+        if self.after is not None:
+            query = query.filter(tuple_(*SHOWS_FEED_KEY) > tuple_(*self.after))
+
+        # One extra row tells whether there is a next page
+        return query.order_by(*SHOWS_FEED_KEY).limit(self.per_page + 1)
+
+    def __iter__(self):
+        for i, row in enumerate(self.query()):
+            (show_date, show_time, venue_id, artist_id,
+             venue_name, artist_name, artist_image_link) = row
+            if i == self.per_page:
+                self.next_cursor = encode_show_cursor(*last)
+                break
+            last = (show_date, show_time, venue_id, artist_id)
+
+            yield {
+                "venue_id": venue_id,
+                "venue_name": venue_name,
+                "artist_id": artist_id,
+                "artist_name": artist_name,
+                "artist_image_link": artist_image_link,
+                "start_time": datetime.combine(show_date, show_time)
+            }
+
+
+#----------------------------------------------------------------------------#
+# Detail pages.
+#----------------------------------------------------------------------------#
+
+
+def shows_of(key, entity_id):
+    """
+    Shows of the venue or artist whose id is `entity_id` in the `key`
+    column, archived ones included, as a subquery. Each side of the UNION
+    ALL is filtered on its own index.
+    """
+    return union_all(*(
+        select(
+            model.show_date, model.show_time, model.venue_id, model.artist_id
+        ).where(getattr(model, key) == entity_id)
+        for model in (Show, ArchivedShow)
+    )).subquery()
+
+
+def partitioned_shows(key, entity_id, other):
+    """
+    Shows of a venue or an artist along with the `other` side of each show,
+    flagged past or upcoming by a CASE on show_date, in a single query.
+    """
+    shows = shows_of(key, entity_id)
+    return db.session.query(
+        case([(shows.c.show_date < today(), True)], else_=False),
+        shows.c.show_date, shows.c.show_time,
+        other.id, other.name, other.image_link
+    ).join(
+        other, shows.c[SHOW_KEYS[other].key] == other.id
+    ).order_by(
+        shows.c.show_date, shows.c.show_time
+    ).all()
+
+
+def split_shows(rows, prefix):
+    past_shows, upcoming_shows = list(), list()
+    for (is_past, show_date, show_time, id, name, image_link) in rows:
+        show = {
+            f"{prefix}_id": id,
+            f"{prefix}_name": name,
+            f"{prefix}_image_link": image_link,
+            "start_time": datetime.combine(show_date, show_time)
+        }
+        if is_past:
+            past_shows.append(show)
+        else:
+            upcoming_shows.append(show)
+    return past_shows, upcoming_shows
+
+
+def venue_detail(venue_id):
+    """
+    Venue page payload in two statements: the venue, then its shows.
+    Returns None when there is no such venue.
+    """
+    venue = Venue.query.get(venue_id)
+    if venue is None:
+        return None
+
+    past_shows, upcoming_shows = split_shows(
+        partitioned_shows('venue_id', venue_id, Artist), 'artist'
+    )
+
+    return {
+        "id": venue.id,
+        "name": venue.name,
+        "genres": venue.genres,
+        "address": venue.address,
+        "city": venue.city,
+        "state": venue.state,
+        "phone": venue.phone,
+        "website": venue.website,
+        "facebook_link": venue.facebook_link,
+        "seeking_talent": venue.seeking_talent,
+        "seeking_description": venue.seeking_description,
+        "image_link": venue.image_link,
+        "past_shows": past_shows,
+        "upcoming_shows": upcoming_shows,
+        "past_shows_count": len(past_shows),
+        "upcoming_shows_count": len(upcoming_shows)
+    }
+
+
+def artist_detail(artist_id, num_availabilities=5):
+    """
+    Artist page payload in two statements: the artist outer joined to its
+    next available dates, then its shows. Returns None when there is no
+    such artist.
+    """
+    available = db.session.query(
+        Availability
+    ).filter(
+        Availability.artist_id == artist_id, Availability.date >= today()
+    ).order_by(
+        Availability.date
+    ).limit(num_availabilities).subquery()
+
+    rows = db.session.query(
+        Artist, available.c.date, available.c.time
+    ).outerjoin(
+        available, available.c.artist_id == Artist.id
+    ).filter(
+        Artist.id == artist_id
+    ).order_by(
+        available.c.date
+    ).all()
+    if not rows:
+        return None
+
+    artist = rows[0][0]
+    availabilities = [
+        datetime.combine(available_date, available_time)
+        for (_, available_date, available_time) in rows
+        if available_date is not None
+    ]
+
+    past_shows, upcoming_shows = split_shows(
+        partitioned_shows('artist_id', artist_id, Venue), 'venue'
+    )
+
+    return {
+        "id": artist.id,
+        "name": artist.name,
+        "genres": artist.genres,
+        "city": artist.city,
+        "state": artist.state,
+        "phone": artist.phone,
+        "website": artist.website,
+        "facebook_link": artist.facebook_link,
+        "seeking_venue": artist.seeking_venue,
+        "seeking_description": artist.seeking_description,
+        "image_link": artist.image_link,
+        "past_shows": past_shows,
+        "upcoming_shows": upcoming_shows,
+        "past_shows_count": len(past_shows),
+        "upcoming_shows_count": len(upcoming_shows),
+        "availabilities": availabilities
+    }
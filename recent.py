@@ -0,0 +1,137 @@
+import os
+import tempfile
+import threading
+from collections import deque
+
+from models import db, Venue, Artist
+
+
+class RecentItems:
+    """
+    The most recently added rows of a model, newest first, as the dicts the
+    homepage renders.
+    """
+
+    def __init__(self, model, size=10):
+        self.model = model
+        self.items = deque(maxlen=size)
+
+    @staticmethod
+    def item(row):
+        return {"id": row.id, "name": row.name, "image_link": row.image_link}
+
+    def load(self):
+        model = self.model
+        rows = db.session.query(
+            model.id, model.name, model.image_link
+        ).order_by(model.id.desc()).limit(self.items.maxlen)
+        self.items = deque(map(self.item, rows), maxlen=self.items.maxlen)
+
+    def update(self, new):
+        for i, item in enumerate(self.items):
+            if item["id"] == new["id"]:
+                self.items[i] = new
+
+
+class Recent:
+    """
+    Recently added venues and artists kept in process, so the homepage
+    needs no query in the steady state.
+
+    Every process loads them on first use and updates them in place on its
+    own writes. Changes are announced to the other processes by replacing a
+    shared version file, whose inode and mtime each process compares with
+    the ones it last saw for the cost of a stat() per read, reloading from
+    the database when they differ.
+    """
+
+    def __init__(self, app=None):
+        self.lists = {Venue: RecentItems(Venue), Artist: RecentItems(Artist)}
+        self.path = None
+        self.version = None
+        self.loaded = False
+        self.lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        size = app.config.get('RECENT_ITEMS', 10)
+        self.lists = {
+            model: RecentItems(model, size) for model in (Venue, Artist)
+        }
+        self.path = app.config.get('RECENT_VERSION_FILE') or os.path.join(
+            tempfile.gettempdir(), 'fyyur-recent.version'
+        )
+        self.loaded = False
+        app.before_first_request(self.get)
+        app.extensions['recent'] = self
+
+    def current_version(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def announce(self):
+        """
+        Replace the version file and return its version, or None when
+        another process replaced it meanwhile, so its change gets loaded.
+        """
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path))
+        with os.fdopen(fd, 'w') as f:
+            f.write(str(os.getpid()))
+            inode = os.fstat(f.fileno()).st_ino
+        os.replace(tmp, self.path)
+        version = self.current_version()
+        if version is None or version[0] != inode:
+            return None
+        return version
+
+    def get(self):
+        """
+        (venues, artists) most recently added, newest first.
+        """
+        version = self.current_version()
+        with self.lock:
+            if not self.loaded or version != self.version:
+                for items in self.lists.values():
+                    items.load()
+                self.loaded, self.version = True, version
+            return tuple(
+                list(self.lists[model].items) for model in (Venue, Artist)
+            )
+
+    def changed(self, apply):
+        with self.lock:
+            # A change of another process not loaded yet must not be missed
+            stale = self.current_version() != self.version
+            apply()
+            self.version = self.announce()
+            if stale or self.version is None:
+                self.loaded = False
+
+    def add(self, row):
+        """
+        After committing a new venue or artist.
+        """
+        item = RecentItems.item(row)
+        self.changed(lambda: self.lists[type(row)].items.appendleft(item))
+
+    def update(self, row):
+        """
+        After committing changes to a venue or artist.
+        """
+        item = RecentItems.item(row)
+        self.changed(lambda: self.lists[type(row)].update(item))
+
+    def invalidate(self):
+        """
+        After deletes and bulk changes, reloads every process.
+        """
+        with self.lock:
+            self.loaded = False
+            self.announce()
+
+
+recent = Recent()
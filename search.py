@@ -0,0 +1,197 @@
+import threading
+from collections import defaultdict
+
+from flask import current_app
+from sqlalchemy import event, func
+
+from models import db, Venue, Artist
+from recent import recent
+
+#----------------------------------------------------------------------------#
+# Search.
+#----------------------------------------------------------------------------#
+
+
+def search(model, *criteria, order_by=(), page=1, per_page=None):
+    """
+    Page of `model` rows matching `criteria` with their number of upcoming
+    shows, read from their counters, in a single query. The total number of
+    matches is computed by a window function over the rows so no extra
+    COUNT query is needed.
+    """
+    per_page = per_page or current_app.config['SEARCH_PAGE_SIZE']
+    page = max(page, 1)
+
+    rows = db.session.query(
+        model.id, model.name, model.upcoming_shows_count,
+        func.count().over()
+    ).filter(
+        *criteria
+    ).order_by(
+        *order_by, model.name, model.id
+    ).limit(per_page).offset((page - 1) * per_page).all()
+
+    count = rows[0][3] if rows else 0
+
+    return {
+        "count": count,
+        "page": page,
+        "has_next": page * per_page < count,
+        "data": [{
+            "id": id,
+            "name": name,
+            "num_upcoming_shows": num_upcoming_shows
+        } for (id, name, num_upcoming_shows, _) in rows]
+    }
+
+
+def search_by_name(model, search_term, **kwargs):
+    """
+    Names containing the search term, most similar first. Postgres matches
+    and ranks through the pg_trgm GIN index on `name`; other databases use
+    the in-process trigram index.
+    """
+    if db.engine.dialect.name != 'postgresql':
+        return name_indexes[model].search(search_term, **kwargs)
+
+    return search(
+        model, model.name.ilike(f'%{search_term}%'),
+        order_by=(func.similarity(model.name, search_term).desc(),),
+        **kwargs
+    )
+
+
+def search_by_city_state(model, search_term, **kwargs):
+    """
+    Search term must follow the format: city, state
+    """
+    try:
+        city, state = search_term.split(',')[0].strip(), \
+                      search_term.split(',')[1].strip()
+    except IndexError:
+        return {"count": 0, "page": 1, "has_next": False, "data": []}
+
+    return search(model, model.city == city, model.state == state, **kwargs)
+
+
+#----------------------------------------------------------------------------#
+# In-process trigram index.
+#----------------------------------------------------------------------------#
+
+
+def trigrams(text):
+    """
+    Trigrams of every word padded the way pg_trgm does it, so similarity
+    ranks the same as `similarity()` in Postgres.
+    """
+    grams = set()
+    for word in text.lower().split():
+        word = f'  {word} '
+        grams.update(word[i:i + 3] for i in range(len(word) - 2))
+    return grams
+
+
+def similarity(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class TrigramIndex:
+    """
+    Fallback name index for databases without pg_trgm, such as SQLite test
+    runs. Candidates are found through the substring trigrams of the term,
+    checked for a case-insensitive substring match, then ranked by trigram
+    similarity.
+
+    The index is rebuilt lazily into new dicts swapped in under a lock, so
+    requests reading the previous ones are not disturbed. It is stale after
+    an insert, update or delete of the model through the ORM in this
+    process, and when the version file of `recent`, replaced by every
+    process adding, changing or deleting venues and artists, has changed.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        # (recent version, {id: name}, {trigram: ids}), never mutated
+        self.snapshot = None
+        self.stale = True
+        self.lock = threading.Lock()
+
+        for action in ('after_insert', 'after_update', 'after_delete'):
+            event.listen(model, action, self.invalidate)
+
+    def invalidate(self, *args):
+        self.stale = True
+
+    def refresh(self, version):
+        # Changes made while reading the rows mark it stale again
+        self.stale = False
+        names, postings = dict(), defaultdict(set)
+        rows = db.session.query(self.model.id, self.model.name)
+        for (id, name) in rows:
+            name = name.lower()
+            names[id] = name
+            for i in range(len(name) - 2):
+                postings[name[i:i + 3]].add(id)
+        self.snapshot = (version, names, postings)
+
+    def current(self):
+        """
+        (names, postings) up to date with every process's changes.
+        """
+        version = recent.current_version()
+        with self.lock:
+            if self.stale or self.snapshot is None or \
+                    self.snapshot[0] != version:
+                self.refresh(version)
+            return self.snapshot[1:]
+
+    def match(self, search_term):
+        """
+        Ids of the names containing the search term, most similar first.
+        """
+        names, postings = self.current()
+
+        term = search_term.lower()
+        grams = [term[i:i + 3] for i in range(len(term) - 2)]
+        if grams:
+            candidates = set.intersection(
+                *(postings.get(gram, set()) for gram in grams)
+            )
+        else:
+            candidates = names.keys()
+
+        term_grams = trigrams(term)
+        ranked = [
+            (-similarity(term_grams, trigrams(names[id])), names[id], id)
+            for id in candidates if term in names[id]
+        ]
+        ranked.sort()
+        return [id for (_, _, id) in ranked]
+
+    def search(self, search_term, page=1, per_page=None):
+        per_page = per_page or current_app.config['SEARCH_PAGE_SIZE']
+        page = max(page, 1)
+
+        ids = self.match(search_term)
+        page_ids = ids[(page - 1) * per_page:page * per_page]
+        rank = {id: i for i, id in enumerate(page_ids)}
+
+        response = search(
+            self.model, self.model.id.in_(page_ids), per_page=per_page
+        )
+        response["data"].sort(key=lambda row: rank[row["id"]])
+        response.update({
+            "count": len(ids),
+            "page": page,
+            "has_next": page * per_page < len(ids)
+        })
+
+        return response
+
+
+name_indexes = {
+    Venue: TrigramIndex(Venue),
+    Artist: TrigramIndex(Artist)
+}
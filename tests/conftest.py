@@ -0,0 +1,38 @@
+import pytest
+
+from app import create_app
+from models import db
+
+
+@pytest.fixture
+def app():
+    """
+    The app on an in memory SQLite database, without CSRF checks, with
+    the response and fragment caches off, so every request hits the
+    database, and the profiler on.
+    """
+    app = create_app(
+        cli=False,
+        SQLALCHEMY_DATABASE_URI='sqlite://',
+        TESTING=True,
+        WTF_CSRF_ENABLED=False,
+        CACHE_BACKEND=None,
+        FRAGMENT_CACHE_BACKEND=None,
+        JINJA_BYTECODE_CACHE_DIR=None,
+        PROFILER_ENABLED=True
+    )
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def profiler(app):
+    return app.extensions['profiler']
@@ -0,0 +1,88 @@
+from datetime import date, time, timedelta
+
+import availability
+from forms import AvailabilityRuleForm
+from models import db, Artist, Availability, AvailabilityRule
+
+
+def artist_with_rule(days):
+    """
+    An artist available every day at 20:00 for `days` days from today,
+    none of them expanded yet.
+    """
+    artist = Artist(
+        name='Artist', city='San Francisco', state='CA',
+        phone='415-555-0100', genres=['Jazz'], seeking_venue=False
+    )
+    db.session.add(artist)
+    db.session.flush()
+    db.session.add(AvailabilityRule(
+        artist_id=artist.id, weekdays=availability.weekday_mask(range(7)),
+        time=time(20), start_date=date.today(),
+        end_date=date.today() + timedelta(days=days),
+        materialized_until=date.today() - timedelta(days=1)
+    ))
+    db.session.commit()
+    return artist.id
+
+
+def test_pages_do_not_insert_availabilities(client, profiler):
+    artist_id = artist_with_rule(days=3650)
+
+    client.get('/artists/available?end=2060-12-31').get_data()
+    with profiler.budget(2) as executed:
+        assert client.get(f'/artists/{artist_id}').status_code == 200
+    assert len(executed) == 2
+    assert Availability.query.count() == 0
+
+
+def test_materialize_command_expands_up_to_the_horizon(app):
+    artist_with_rule(days=3650)
+    horizon = app.config['AVAILABILITY_HORIZON_DAYS']
+
+    result = app.test_cli_runner().invoke(
+        availability.materialize_command
+    )
+    assert f'{horizon + 1} dates expanded' in result.output
+    assert Availability.query.count() == horizon + 1
+
+
+def test_rules_cannot_last_longer_than_the_maximum(app):
+    days = app.config['AVAILABILITY_RULE_MAX_DAYS']
+    start = date.today()
+    for end, valid in ((start + timedelta(days=days), True),
+                       (start + timedelta(days=days + 1), False)):
+        with app.test_request_context(method='POST', data={
+            "weekdays": ['4'], "time": '20:00',
+            "start_date": start.isoformat(), "end_date": end.isoformat()
+        }):
+            assert AvailabilityRuleForm().validate() is valid
+
+
+def test_availability_form_page(client):
+    artist_id = artist_with_rule(days=7)
+
+    assert client.get('/artists/999/add_availability').status_code == 404
+    response = client.get(f'/artists/{artist_id}/add_availability')
+    assert response.status_code == 200
+    assert f'/artists/{artist_id}/add_availability_rule'.encode() in \
+        response.get_data()
+
+
+def test_rule_submission_expands_up_to_the_horizon(app, client):
+    artist_id = artist_with_rule(days=0)
+    horizon = app.config['AVAILABILITY_HORIZON_DAYS']
+    start = date.today()
+
+    response = client.post(
+        f'/artists/{artist_id}/add_availability_rule', data={
+            "weekdays": [str(day) for day in range(7)], "time": '20:00',
+            "start_date": start.isoformat(),
+            "end_date": (start + timedelta(days=365)).isoformat()
+        }
+    )
+    assert response.status_code == 302
+    assert AvailabilityRule.query.count() == 2
+    assert Availability.query.filter(
+        Availability.date > start
+    ).count() == horizon
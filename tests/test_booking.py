@@ -0,0 +1,55 @@
+from datetime import date, datetime, time, timedelta
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from booking import BookingError, book_show, book_shows
+from models import db, Artist, Availability, Show, Venue
+
+
+@pytest.fixture
+def catalogue(app):
+    """
+    Two venues and an artist available every evening of the coming week.
+    """
+    for n in (1, 2):
+        db.session.add(Venue(
+            id=n, name=f'Venue {n}', city='San Francisco', state='CA',
+            address=f'{n} Main Street', phone='415-555-0100',
+            genres=['Jazz'], seeking_talent=False
+        ))
+    db.session.add(Artist(
+        id=1, name='Artist 1', city='San Francisco', state='CA',
+        phone='415-555-0101', genres=['Jazz'], seeking_venue=False
+    ))
+    db.session.add_all(
+        Availability(artist_id=1, date=date.today() + timedelta(days=day),
+                     time=time(18))
+        for day in range(7)
+    )
+    db.session.commit()
+
+
+def evening(days):
+    return datetime.combine(date.today() + timedelta(days=days), time(20))
+
+
+def test_artist_cannot_play_two_venues_a_day(catalogue):
+    book_show(1, 1, evening(1))
+    db.session.commit()
+
+    with pytest.raises(BookingError, match='Artist 1 has already'):
+        book_show(1, 2, evening(1))
+    with pytest.raises(BookingError, match='#2: Artist 1 has already'):
+        book_shows([(1, 1, evening(2)), (1, 2, evening(2))])
+
+
+def test_unique_index_rules_out_two_shows_of_an_artist_a_day(catalogue):
+    db.session.add_all([
+        Show(artist_id=1, venue_id=1, show_date=evening(1).date(),
+             show_time=time(20)),
+        Show(artist_id=1, venue_id=2, show_date=evening(1).date(),
+             show_time=time(22))
+    ])
+    with pytest.raises(IntegrityError):
+        db.session.commit()
@@ -0,0 +1,16 @@
+import cache
+from cache import LRUBackend
+
+
+def test_lru_entries_expire_after_their_timeout(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, 'time', lambda: now[0])
+    backend = LRUBackend()
+    backend.set('page', b'html', timeout=300)
+    backend.set('forever', b'html')
+
+    now[0] += 299
+    assert backend.get('page') == b'html'
+    now[0] += 1
+    assert backend.get('page') is None
+    assert backend.get('forever') == b'html'
@@ -0,0 +1,3 @@
+def test_debug_endpoints_are_off_by_default(client):
+    for path in ('/_debug/profile', '/_debug/pool', '/_debug/cache'):
+        assert client.get(path).status_code == 404
@@ -0,0 +1,33 @@
+import json
+from datetime import date, time
+
+from exporter import export
+from models import db, Artist, ArchivedShow, Show, Venue
+
+
+def test_shows_export_includes_archived_shows(app):
+    db.session.add(Venue(
+        id=1, name='Venue 1', city='San Francisco', state='CA',
+        address='1 Main Street', phone='415-555-0100', genres=['Jazz'],
+        seeking_talent=False
+    ))
+    db.session.add(Artist(
+        id=1, name='Artist 1', city='San Francisco', state='CA',
+        phone='415-555-0101', genres=['Jazz'], seeking_venue=False
+    ))
+    db.session.add(ArchivedShow(
+        artist_id=1, venue_id=1, show_date=date(2020, 1, 3),
+        show_time=time(20)
+    ))
+    db.session.add(Show(
+        artist_id=1, venue_id=1, show_date=date(2026, 1, 3),
+        show_time=time(20)
+    ))
+    db.session.commit()
+
+    def exported(**kwargs):
+        return [json.loads(line)["show_date"]
+                for line in export('shows', 'ndjson', **kwargs)]
+
+    assert exported() == ['2020-01-03', '2026-01-03']
+    assert exported(since=date(2021, 1, 1)) == ['2026-01-03']
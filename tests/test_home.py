@@ -0,0 +1,21 @@
+from cache import cache, LRUBackend
+from models import db, Venue
+from recent import recent
+
+
+def test_homepage_shows_venues_another_worker_added(app, client, tmp_path,
+                                                    monkeypatch):
+    monkeypatch.setattr(cache, 'backend', LRUBackend())
+    monkeypatch.setattr(recent, 'path', str(tmp_path / 'recent.version'))
+    client.get('/')
+
+    # Added by another worker, which announces it through the version file
+    db.session.add(Venue(
+        name='Elsewhere', city='San Francisco', state='CA',
+        address='1 Main Street', phone='415-555-0100', genres=['Jazz'],
+        seeking_talent=False
+    ))
+    db.session.commit()
+    recent.announce()
+
+    assert b'Elsewhere' in client.get('/').get_data()
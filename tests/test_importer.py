@@ -0,0 +1,65 @@
+from datetime import date, timedelta
+
+from importer import ENTITIES, Report, import_rows
+from models import Venue, Artist
+
+
+def venue(n):
+    return {
+        "name": f'Venue {n}', "city": 'San Francisco', "state": 'CA',
+        "address": f'{n} Main Street', "phone": '415-555-0100',
+        "genres": ['Jazz', 'Blues']
+    }
+
+
+def artist(n):
+    return {
+        "name": f'Artist {n}', "city": 'San Francisco', "state": 'CA',
+        "phone": f'415-555-{n:04d}', "genres": ['Jazz']
+    }
+
+
+def show(artist_id, venue_id, days):
+    start = date.today() + timedelta(days=days)
+    return {
+        "artist_id": artist_id, "venue_id": venue_id,
+        "start_time": f'{start.isoformat()} 20:00:00'
+    }
+
+
+def imported(entity, rows):
+    report = Report(rejects=None)
+    import_rows(ENTITIES[entity], rows, report)
+    return report
+
+
+def test_import_venues_and_artists_start_with_empty_counters(app):
+    assert imported('venues', [venue(1), venue(2)]).written == 2
+    assert imported('artists', [artist(1)]).written == 1
+
+    for entity in Venue.query.all() + Artist.query.all():
+        assert entity.upcoming_shows_count == 0
+        assert entity.past_shows_count == 0
+        assert entity.next_show_date is None
+
+
+def test_import_shows_counts_them(app):
+    imported('venues', [venue(1), venue(2)])
+    imported('artists', [artist(1)])
+    imported('shows', [show(1, 1, 3), show(1, 2, 10), show(1, 1, -5)])
+
+    artist_ = Artist.query.get(1)
+    assert artist_.upcoming_shows_count == 2
+    assert artist_.past_shows_count == 1
+    assert artist_.next_show_date == date.today() + timedelta(days=3)
+    venue_ = Venue.query.get(1)
+    assert (venue_.upcoming_shows_count, venue_.past_shows_count) == (1, 1)
+
+
+def test_import_reports_duplicates_apart_from_written_rows(app):
+    imported('venues', [venue(1)])
+    imported('artists', [artist(1)])
+    imported('shows', [show(1, 1, 3)])
+
+    report = imported('shows', [show(1, 1, 3), show(1, 1, 4)])
+    assert (report.written, report.duplicates) == (1, 1)
@@ -0,0 +1,17 @@
+import logging
+
+from benchmarks.seed import seed
+
+
+def test_budget_counts_the_statements_of_streamed_responses(
+        client, profiler, monkeypatch, caplog):
+    seed(venues=5, artists=5, shows=20, availabilities=20)
+    monkeypatch.setattr(profiler, 'query_budget', 0)
+
+    for path, endpoint in (('/shows', 'shows'),
+                           ('/artists/available', 'available_artists')):
+        caplog.clear()
+        with caplog.at_level(logging.WARNING, logger='fyyur.profiler'):
+            client.get(path).get_data()
+        assert profiler.history[-1]["statements"] > 0
+        assert f'{endpoint} ran' in caplog.text
@@ -0,0 +1,43 @@
+from models import db, Venue
+from recent import recent
+from search import name_indexes, search_by_name
+
+
+def venue(n, name):
+    return {
+        "id": n, "name": name, "city": 'San Francisco', "state": 'CA',
+        "address": f'{n} Main Street', "phone": '415-555-0100',
+        "genres": ['Jazz'], "seeking_talent": False
+    }
+
+
+def names(term):
+    return [row["name"] for row in search_by_name(Venue, term)["data"]]
+
+
+def test_finds_names_another_worker_added(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(recent, 'path', str(tmp_path / 'recent.version'))
+    db.session.execute(Venue.__table__.insert(), [venue(1, 'The Musical Hop')])
+    db.session.commit()
+    assert names('hop') == ['The Musical Hop']
+
+    # Inserted by another worker, without this process's ORM events, and
+    # announced through the version file
+    db.session.execute(Venue.__table__.insert(), [venue(2, 'Hop Along')])
+    db.session.commit()
+    recent.announce()
+
+    assert sorted(names('hop')) == ['Hop Along', 'The Musical Hop']
+
+
+def test_refresh_leaves_the_previous_index_untouched(app):
+    db.session.execute(Venue.__table__.insert(), [venue(1, 'Park Square')])
+    db.session.commit()
+    index = name_indexes[Venue]
+    previous, _ = index.current()
+
+    db.session.add(Venue(**venue(2, 'Park Lane')))
+    db.session.commit()
+
+    assert list(previous.values()) == ['park square']
+    assert sorted(index.current()[0].values()) == ['park lane', 'park square']
@@ -0,0 +1,22 @@
+from cache import cache, LRUBackend
+from benchmarks.seed import seed
+
+
+def test_shows_stream_and_are_cached_once_sent(app, client, monkeypatch):
+    backend = LRUBackend()
+    monkeypatch.setattr(cache, 'backend', backend)
+    seed(venues=5, artists=5, shows=50, availabilities=0)
+
+    hits = cache.hits['shows']
+
+    # Sent chunk by chunk, the page is only stored once fully sent
+    response = client.get('/shows', buffered=False)
+    chunks = iter(response.response)
+    body = next(chunks)
+    assert not backend.entries
+    body += b''.join(chunks)
+    response.close()
+    assert len(backend.entries) == 1
+
+    assert client.get('/shows').get_data() == body
+    assert cache.hits['shows'] == hits + 1
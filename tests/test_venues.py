@@ -0,0 +1,23 @@
+from models import db
+from benchmarks.seed import seed
+
+
+def statements(client, profiler, path):
+    # The first request of a process also loads the recently added lists
+    client.get(path).get_data()
+    with profiler.budget(100) as executed:
+        response = client.get(path)
+        response.get_data()
+    assert response.status_code == 200
+    return len(executed)
+
+
+def test_venues_statements_do_not_grow_with_rows(client, profiler):
+    counts = list()
+    for venues in (20, 200):
+        db.drop_all()
+        db.create_all()
+        seed(venues=venues, artists=venues, shows=venues * 5,
+             availabilities=0)
+        counts.append(statements(client, profiler, '/venues'))
+    assert counts[0] == counts[1]
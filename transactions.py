@@ -0,0 +1,115 @@
+import json
+import logging
+import random
+import threading
+from collections import Counter, defaultdict
+from functools import wraps
+from time import perf_counter, sleep
+
+from sqlalchemy.exc import DBAPIError
+
+from models import db
+
+logger = logging.getLogger('fyyur.transactions')
+
+# Serialization failure and deadlock, the transaction can simply be rerun
+RETRYABLE_PGCODES = ('40001', '40P01')
+
+
+def is_retryable(error):
+    if not isinstance(error, DBAPIError):
+        return False
+    if getattr(error.orig, 'pgcode', None) in RETRYABLE_PGCODES:
+        return True
+    # SQLite's equivalent when another connection holds the write lock
+    return 'database is locked' in str(error.orig)
+
+
+class UnitOfWork:
+    """
+    Runs the writes of a request as one transaction.
+
+    Decorated functions add or change rows in the session; the transaction
+    is committed once they return and rolled back if they raise. Failures
+    to serialize and deadlocks are retried with exponential backoff and
+    jitter, rerunning the function, so it must read what it changes
+    itself. Other errors are logged as JSON to the 'fyyur.transactions'
+    logger and raised. Exceptions listed in `expected`, such as
+    BookingError, are rolled back and raised without being logged as
+    errors.
+
+    Commits, retries, failures and their times are counted per unit for
+    the /_debug/transactions endpoint.
+    """
+
+    def __init__(self, app=None):
+        self.max_retries = 3
+        self.backoff = 0.05
+        self.lock = threading.Lock()
+        self.counts = defaultdict(Counter)
+        self.times = defaultdict(float)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.max_retries = app.config.get('TRANSACTION_MAX_RETRIES', 3)
+        self.backoff = app.config.get('TRANSACTION_BACKOFF', 0.05)
+        app.extensions['unit_of_work'] = self
+
+    def count(self, name, outcome, elapsed):
+        with self.lock:
+            self.counts[name][outcome] += 1
+            self.times[name] += elapsed
+
+    def __call__(self, name, expected=()):
+        def decorator(work):
+            @wraps(work)
+            def wrapper(*args, **kwargs):
+                attempt = 0
+                while True:
+                    attempt += 1
+                    start = perf_counter()
+                    try:
+                        result = work(*args, **kwargs)
+                        db.session.commit()
+                    except expected:
+                        db.session.rollback()
+                        self.count(name, 'rejected', perf_counter() - start)
+                        raise
+                    except Exception as error:
+                        db.session.rollback()
+                        elapsed = perf_counter() - start
+                        retry = is_retryable(error) and \
+                            attempt <= self.max_retries
+                        self.count(
+                            name, 'retried' if retry else 'failed', elapsed
+                        )
+                        log = logger.warning if retry else logger.error
+                        log(json.dumps({
+                            "unit": name,
+                            "attempt": attempt,
+                            "ms": round(elapsed * 1000, 3),
+                            "retry": retry,
+                            "error": type(error).__name__,
+                            "message": str(error).splitlines()[0]
+                        }), exc_info=not retry)
+                        if not retry:
+                            raise
+                        sleep(self.backoff * 2 ** (attempt - 1) *
+                              random.uniform(.5, 1.5))
+                        continue
+                    self.count(name, 'committed', perf_counter() - start)
+                    return result
+            return wrapper
+        return decorator
+
+    def stats(self):
+        with self.lock:
+            return {
+                name: dict(
+                    counts, ms=round(self.times[name] * 1000, 3)
+                ) for name, counts in self.counts.items()
+            }
+
+
+unit_of_work = UnitOfWork()
@@ -0,0 +1,121 @@
+import json
+import os
+from time import perf_counter
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from jinja2 import FileSystemBytecodeCache
+from sqlalchemy import exc
+from sqlalchemy.orm import configure_mappers
+from sqlalchemy.pool import NullPool, QueuePool
+
+import formatting
+from models import db
+
+#----------------------------------------------------------------------------#
+# Warm-up.
+#----------------------------------------------------------------------------#
+
+
+class WarmUp:
+    """
+    Does the work a new worker would otherwise leave to its first requests,
+    before it accepts any: compiling every template, loading the locale
+    data of the datetime filter, configuring the mappers and opening the
+    pool's connections. wsgi.py calls it once the app is created.
+
+    Compiled templates are also cached on disk under
+    JINJA_BYTECODE_CACHE_DIR, so workers started after the first one, or
+    after a restart, load them instead of compiling them again. The cache
+    is keyed on the template sources, a deploy changing one recompiles it.
+    """
+
+    def __init__(self, app=None):
+        self.timings = dict()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        directory = app.config.get('JINJA_BYTECODE_CACHE_DIR')
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+        app.extensions['warmup'] = self
+
+    def __call__(self, app):
+        """
+        Warm `app` up, returning and logging what each step took.
+        """
+        with app.app_context():
+            self.timings = {
+                "templates": self.timed(self.compile_templates, app),
+                "formatting": self.timed(self.load_formatting),
+                "mappers": self.timed(configure_mappers),
+                "pool": self.timed(
+                    self.prime_pool, app.config.get('DB_WARMUP_CONNECTIONS')
+                )
+            }
+        app.logger.info('warmed up %s', json.dumps(self.timings))
+        return self.timings
+
+    @staticmethod
+    def timed(step, *args):
+        start = perf_counter()
+        count = step(*args)
+        timing = {"ms": round((perf_counter() - start) * 1000, 3)}
+        if count is not None:
+            timing["count"] = count
+        return timing
+
+    @staticmethod
+    def compile_templates(app):
+        # The app's own templates/, blueprints have none
+        names = app.jinja_loader.list_templates()
+        for name in names:
+            app.jinja_env.get_template(name)
+        return len(names)
+
+    @staticmethod
+    def load_formatting():
+        for pattern in formatting.FORMATS.values():
+            formatting.compiled_pattern(pattern)
+        formatting.get_locale('en')
+
+    @staticmethod
+    def prime_pool(connections=None):
+        """
+        Open `connections` connections, DB_POOL_SIZE at most, and return
+        them to the pool. Without a pool to keep them, behind PgBouncer,
+        there is nothing to prime. A database down is left to the requests
+        to report, the worker still starts.
+        """
+        pool = db.engine.pool
+        if isinstance(pool, NullPool):
+            return 0
+        size = pool.size() if isinstance(pool, QueuePool) else 1
+        connections = size if connections is None else min(connections, size)
+        opened = list()
+        try:
+            for _ in range(connections):
+                opened.append(db.engine.raw_connection())
+        except exc.DBAPIError as error:
+            current_app.logger.warning('could not prime the pool: %s', error)
+        finally:
+            for connection in opened:
+                connection.close()
+        return len(opened)
+
+
+warm_up = WarmUp()
+
+
+@click.command('warmup')
+@with_appcontext
+def warmup_command():
+    """Compile the templates into the bytecode cache and check the
+    database, run on deploy before starting the workers."""
+    timings = warm_up(current_app._get_current_object())
+    for step, timing in timings.items():
+        count = f' ({timing["count"]})' if "count" in timing else ''
+        click.echo(f'{step}: {timing["ms"]:.1f} ms{count}')
@@ -0,0 +1,14 @@
+"""
+Entry point of the production server, e.g.
+
+    gunicorn --workers 4 wsgi:app
+
+Each worker imports this module, building the app without the flask
+commands and warming it up before it accepts requests. Do not --preload
+it: the pool's connections must be opened by the workers themselves.
+"""
+from app import create_app
+from warmup import warm_up
+
+app = create_app(cli=False)
+warm_up(app)